@@ -3,6 +3,16 @@ from test.parser.RegexParserTest import RegexParserTest
 from test.parser.TableParserTest import TableParserTest
 from test.parser.UtilTest import UtilTest
 from test.parser.IntrepidRASParserTest import IntrepidRASParserTest
+from test.parser.EventTableTest import EventTableTest
+from test.parser.ParsedLogCacheTest import ParsedLogCacheTest
+from test.parser.LogReaderTest import LogReaderTest
+from test.parser.LogFollowerTest import LogFollowerTest
+from test.parser.TimeIndexTest import TimeIndexTest
+from test.parser.LogMergerTest import LogMergerTest
+from test.parser.ExternalSortTest import ExternalSortTest
+from test.parser.SketchesTest import SketchesTest
+from test.parser.TemplateMinerTest import TemplateMinerTest
+from test.parser.VocabularyTest import VocabularyTest
 from test.strategy.EventLevelSlidingWindowTest import EventLevelSlidingWindowTest
 from test.strategy.IBMPaperStrategyTest import IBMPaperStrategyTest
 from test.strategy.SlidingWindowTest import SlidingWindowTest
@@ -17,5 +27,15 @@ suite.addTests(unittest.TestLoader().loadTestsFromTestCase(UtilTest))
 suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TableParserTest))
 suite.addTests(unittest.TestLoader().loadTestsFromTestCase(RegexParserTest))
 suite.addTests(unittest.TestLoader().loadTestsFromTestCase(IBMPaperStrategyTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(EventTableTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(ParsedLogCacheTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(LogReaderTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(LogFollowerTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TimeIndexTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(LogMergerTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(ExternalSortTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(SketchesTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TemplateMinerTest))
+suite.addTests(unittest.TestLoader().loadTestsFromTestCase(VocabularyTest))
 
 unittest.TextTestRunner(verbosity=2).run(suite)
\ No newline at end of file
@@ -40,6 +40,11 @@ if __name__ == '__main__':
     # The path to the log file to use
     logFilePath = projectRoot + '/log/bgl.log'
 
+    # Parse the log once for all experiments, reusing the cached parse from previous runs if the log is unchanged, and
+    #   keeping only the fields the strategies use
+    parsedLogData = BlueGeneParser.parse(logFilePath, cacheDirectory=projectRoot + '/cache',
+                                         fields=['EVENT_TIME', 'SEVERITY', 'CAT'])
+
     # Run each experiment, only learning the model if it doesn't already exist
     for strategy in experiments:
         modelFilePath = projectRoot + '/model/' + strategy.dataSetName + ' - SVMFatalInLastWindowModel'
@@ -47,7 +52,6 @@ if __name__ == '__main__':
         # If the model hasn't been learned, learn it, otherwise just load it
         if not os.path.exists(modelFilePath):
 
-            parsedLogData = BlueGeneParser.parse(logFilePath)
             testData = strategy.parseData(parsedLogData)
             model = strategy.learn(testData)
 
@@ -61,7 +65,6 @@ if __name__ == '__main__':
 
 
         # Gather test data & use the model to predict labels
-        parsedLogData = BlueGeneParser.parse(logFilePath)
         testData = strategy.parseData(parsedLogData)
 
         strategy.predict(testData)
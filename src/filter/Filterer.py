@@ -1,76 +1,561 @@
+from bisect import bisect_left
+from collections import deque
+from multiprocessing import Pool, cpu_count
 import os
-from datetime import datetime
+import numpy
 from src.filter import PearsonCorrelation
+from src.parser import ParserUtil
+from src.parser.Sketches import MinHash
+from src.parser.Vocabulary import Vocabulary
 from src.parser.BlueGene.BlueGeneParser import parse
+from src.parser.EventTable import EventTable
 
 __author__ = 'Roman'
 
+# The time within which an event can make a later event redundant, in microseconds
+HORIZON = 20 * 60 * 1000000
+
+# The correlation an event must exceed to make a later event redundant, as (seconds, correlation) pairs from the
+#   longest time difference down: the first pair whose number of seconds the time difference exceeds applies
+REQUIRED_CORRELATIONS = [(20 * 60, 1.0), (10 * 60, 0.9), (5 * 60, 0.8), (60, 0.7)]
+
+# The correlation required of events within a minute of each other
+MINIMUM_REQUIRED_CORRELATION = 0.0
+
+# The number of events scored at once by batchedRedundantEvents
+BATCH_SIZE = 256
+
+# The number of events at the start of a partition that parallelRedundantEvents first filters again when reconciling it
+RECONCILE_SIZE = 256
+
+# The number of MinHash values of each message, and the number of bands they are split into by lshRedundantEvents
+LSH_SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+
 def getRequiredCorrelation(seconds):
-    if seconds > 20 * 60:
-        return 1.0
-    if seconds > 10 * 60:
-        return 0.9
-    if seconds > 5 * 60:
-        return 0.8
-    if seconds > 60:
-        return 0.7
-    #if seconds > 30:
-    #    return 0.0
-    #return -1.0
-    return 0.0
-
-def filter(log, dictionary=None):
-    if dictionary == None:
-        dictionary = set()
-        for line in log:
-            for word in line["MESSAGE"].split(" "):
-                dictionary.add(word)
-
-    TIMESTAMP_FORMAT = "%Y-%m-%d-%H.%M.%S.%f"
-    result = []
-
-    step = len(log)/1000
+    for limit, requiredCorr in REQUIRED_CORRELATIONS:
+        if seconds > limit:
+            return requiredCorr
+    return MINIMUM_REQUIRED_CORRELATION
+
+def requiredCorrelations(seconds):
+    """
+      Applies getRequiredCorrelation to a whole array of time differences, in seconds
+    """
+    return numpy.select([seconds > limit for limit, requiredCorr in REQUIRED_CORRELATIONS],
+                        [requiredCorr for limit, requiredCorr in REQUIRED_CORRELATIONS], MINIMUM_REQUIRED_CORRELATION)
+
+def eventTimestamps(log):
+    """
+      Gets the timestamps of all events in microseconds, reading them from the timestamp column of an EventTable
+        directly, or from the timestamps decoded at parse time
+    """
+    if isinstance(log, EventTable):
+        return [int(timestamp) for timestamp in log.timestamps]
+    return [ParserUtil.recordTimestamp(entry) for entry in log]
+
+def vocabulary(log, dictionary=None):
+    """
+      Gets the vocabulary the messages of a log are compared over, which is either given as a Vocabulary, built from
+        a set of words, or built from every word of the log
+    """
+    if dictionary is None:
+        return Vocabulary.fromLog(log)
+    if isinstance(dictionary, Vocabulary):
+        return dictionary
+    return Vocabulary(sorted(dictionary))
+
+def ignoredEvents(log):
+    """
+      Marks the events whose category is "ignore", which are dropped without being compared, reading the category
+        codes of an EventTable directly
+
+        @return a bytearray holding 1 for each ignored event, and 0 for every other event
+    """
+    if isinstance(log, EventTable):
+        if len(log) == 0 or 'CAT' not in log.codes:
+            return bytearray(len(log))
+        return bytearray((log.codes['CAT'] == log.code('CAT', "ignore")).astype(numpy.uint8).tostring())
+    return bytearray(1 if entry['CAT'] == "ignore" else 0 for entry in log)
+
+class FieldPrefix(object):
+    """
+      Blocking key holding the first characters of a field, such as the rack and midplane of a BG/L LOCATION. Unlike a
+        lambda, it can be sent to the processes of a parallel filter.
+    """
+
+    def __init__(self, key, length):
+        self.key = key
+        self.length = length
+
+    def __call__(self, entry):
+        return entry[self.key][:self.length]
+
+    def __repr__(self):
+        return 'FieldPrefix(%r, %r)' % (self.key, self.length)
+
+def eventBlocks(log, blockingKeys=None):
+    """
+      Gets the block of each event, which is the tuple of its values of the blocking keys. Each blocking key is either
+        the name of a field, such as CAT, SEVERITY or TEMPLATE_ID, or a function of the event, see FieldPrefix.
+
+        @return the list of the block of each event, all of which are the empty tuple if there are no blocking keys
+    """
+    if not blockingKeys:
+        return [()] * len(log)
+    return [eventBlock(entry, blockingKeys) for entry in log]
+
+def eventBlock(entry, blockingKeys):
+    """
+      Gets the block of a single event, see eventBlocks
+    """
+    return tuple(key(entry) if callable(key) else entry[key] for key in blockingKeys or ())
+
+def redundantEvents(log, dictionary=None, blockingKeys=None, blockThresholds=None, progress=False):
+    """
+      Finds the events removed by filter, in a single pass over the log in time order. The kept events of the last
+        20 minutes of each block are held in a deque, oldest first. Each event is compared with those of its block, and
+        is kept only if none of them is correlated enough to it, so the work per event is proportional to the number
+        of kept events around it rather than to the number of events. The log itself is never modified.
+
+        @param blockingKeys the fields or functions of an event that an event must share with an earlier event to be
+        compared with it, see eventBlocks, or None to compare every pair of events
+        @param blockThresholds the function giving the required correlation at a time difference in seconds of each
+        block, for the blocks that do not use getRequiredCorrelation
+        @param progress prints the percentage of the log filtered so far
+        @return a bytearray holding 1 for each removed event (redundant or ignored), and 0 for each kept event
+    """
+    dictionary = vocabulary(log, dictionary)
+    dictionarySize = len(dictionary)
+    tokens = dictionary.tokenizeLog(log)
+    timestamps = eventTimestamps(log)
+    removed = ignoredEvents(log)
+    blocks = eventBlocks(log, blockingKeys)
+    blockThresholds = blockThresholds or {}
+
+    # The kept events of each block
+    keptEvents = {}
+
+    # The number of kept events in the deque of each block with each token array. Events with the same message share
+    #   the same array (see Vocabulary.tokenizeLog), and identical token sets are always perfectly correlated, so with
+    #   the default thresholds, an event repeating the message of a kept event of its block is redundant without being
+    #   compared.
+    keptEventTokens = {}
+
+    step = max(len(log)/1000, 1)
     percent = -0.1
-    for i in xrange(0,len(log)-1):
-        if i % step == 0:
+    for j in xrange(len(log)):
+        if progress and j % step == 0:
             percent += 0.1
             print percent, "% complete"
 
-        if (log[i]['CAT'] == "ignore"):
+        if removed[j]:
             continue
-        else:
-            result.append(log[i])
 
-        logIDate = datetime.strptime(log[i]['EVENT_TIME'], TIMESTAMP_FORMAT)
-        for j in xrange(i+1,len(log)-1):
-            if (log[j]['CAT'] == "ignore"):
-                continue
+        block = blocks[j]
+        kept = keptEvents.get(block)
+        if kept is None:
+            kept = keptEvents[block] = deque()
+            keptEventTokens[block] = {}
+        keptTokens = keptEventTokens[block]
+
+        # Forget the kept events that are too old to make this or any later event redundant
+        logJDate = timestamps[j]
+        while kept and logJDate - timestamps[kept[0]] > HORIZON:
+            tokensId = id(tokens[kept.popleft()])
+            keptTokens[tokensId] -= 1
+            if keptTokens[tokensId] == 0:
+                del keptTokens[tokensId]
+
+        requiredCorrelation = blockThresholds.get(block, getRequiredCorrelation)
+        if requiredCorrelation is getRequiredCorrelation and id(tokens[j]) in keptTokens:
+            removed[j] = 1
+            continue
 
-            logJDate = datetime.strptime(log[j]['EVENT_TIME'], TIMESTAMP_FORMAT)
-            timeDiff = (logJDate - logIDate).total_seconds()
-            if (timeDiff > 20 * 60):
+        for i in kept:
+            timeDiff = (logJDate - timestamps[i]) / 1000000.0
+            requiredCorr = requiredCorrelation(timeDiff)
+            corr = PearsonCorrelation.tokenCorrelation(tokens[i], tokens[j], dictionarySize)
+            if (corr > requiredCorr):
+                removed[j] = 1
                 break
+        else:
+            kept.append(j)
+            keptTokens[id(tokens[j])] = keptTokens.get(id(tokens[j]), 0) + 1
+
+    return removed
+
+def distinctTokens(tokens, events):
+    """
+      Gets the distinct token arrays of some events, telling apart the arrays shared by events with the same message
+
+        @return the list of the distinct token arrays, and the numpy array of the index of the array of each event in it
+    """
+    distinct = {}
+    arrays = []
+    for i in events:
+        if id(tokens[i]) not in distinct:
+            distinct[id(tokens[i])] = len(arrays)
+            arrays.append(tokens[i])
+    return arrays, numpy.array([distinct[id(tokens[i])] for i in events], dtype=int)
+
+def batchedRedundantEvents(log, dictionary=None, batchSize=BATCH_SIZE, blockingKeys=None, blockThresholds=None):
+    """
+      Finds the same events as redundantEvents, scoring each batch of <code>batchSize</code> events at once. The
+        distinct token arrays of the batch and of the kept events of the previous 20 minutes are correlated with each
+        other by a single matrix product, see PearsonCorrelation.correlationMatrix, and compared with the thresholds of
+        their time differences as arrays. Only the choice of which events of the batch are kept is made one event at a
+        time, since each event is only compared with the earlier events that were kept. Events of different blocks are
+        masked out of the comparisons, see redundantEvents for blockingKeys and blockThresholds.
+
+        @return a bytearray holding 1 for each removed event (redundant or ignored), and 0 for each kept event
+    """
+    dictionary = vocabulary(log, dictionary)
+    dictionarySize = len(dictionary)
+    tokens = dictionary.tokenizeLog(log)
+    timestamps = numpy.array(eventTimestamps(log), dtype=numpy.int64)
+    removed = ignoredEvents(log)
+
+    # The blocks of the events, as integer codes
+    blockCodes = {}
+    blocks = numpy.array([blockCodes.setdefault(block, len(blockCodes)) for block in eventBlocks(log, blockingKeys)],
+                         dtype=int)
+    blockThresholds = [(blockCodes[block], numpy.vectorize(requiredCorrelation, otypes=[float]))
+                       for block, requiredCorrelation in (blockThresholds or {}).iteritems() if block in blockCodes]
+
+    kept = deque()
+    for start in xrange(0, len(log), batchSize):
+        batch = [j for j in xrange(start, min(start + batchSize, len(log))) if not removed[j]]
+        if not batch:
+            continue
+
+        # Forget the kept events that are too old to make any event of the batch redundant
+        while kept and timestamps[batch[0]] - timestamps[kept[0]] > HORIZON:
+            kept.popleft()
+
+        # Events with the same message share the same token array, so each distinct array is only correlated once
+        candidates = list(kept) + batch
+        batchTokens, batchIndices = distinctTokens(tokens, batch)
+        candidateTokens, candidateIndices = distinctTokens(tokens, candidates)
+        corr = PearsonCorrelation.correlationMatrix(batchTokens, candidateTokens, dictionarySize)
+        corr = corr[batchIndices][:, candidateIndices]
+
+        timeDiffs = timestamps[batch][:, None] - timestamps[candidates][None, :]
+        seconds = timeDiffs / 1000000.0
+        requiredCorr = requiredCorrelations(seconds)
+        for blockCode, requiredCorrelation in blockThresholds:
+            rows = blocks[batch] == blockCode
+            if rows.any():
+                requiredCorr[rows] = requiredCorrelation(seconds[rows])
+        redundant = (corr > requiredCorr) & (timeDiffs <= HORIZON) & (blocks[batch][:, None] == blocks[candidates])
+
+        # An event of the batch is redundant if any earlier kept event is correlated enough to it. The events of
+        #   earlier batches are already decided, so only the events of this batch are checked one at a time.
+        offset = len(kept)
+        undecided = ~redundant[:, :offset].any(axis=1)
+        keptInBatch = []
+        for index in numpy.flatnonzero(undecided):
+            if redundant[index, offset + numpy.array(keptInBatch, dtype=int)].any():
+                undecided[index] = False
+            else:
+                keptInBatch.append(index)
+        for index, j in enumerate(batch):
+            if undecided[index]:
+                kept.append(j)
+            else:
+                removed[j] = 1
+
+    return removed
 
-            requiredCorr = getRequiredCorrelation(timeDiff)
-            corr = PearsonCorrelation.correlation(log[i], log[j], dictionary)
+def lshRedundantEvents(log, dictionary=None, bands=LSH_BANDS, signatureSize=LSH_SIGNATURE_SIZE, blockingKeys=None,
+                       blockThresholds=None):
+    """
+      Finds the events removed by filter, comparing each event only with the kept events of the previous 20 minutes
+        whose messages are likely to be near-duplicates of its own. Each message is signed with MinHash, and the kept
+        events are indexed by each band of their signatures (locality-sensitive hashing), so that an event is only
+        compared with the kept events it shares a band with. The candidates are verified with the exact correlation,
+        so the work per event no longer grows with the number of kept events during alert storms.
+
+      This is an approximation of redundantEvents: events are only found redundant if their messages are near-duplicates
+        of a kept message, which with the default 16 bands of 4 values is likely from a Jaccard similarity of about 0.5.
+        Dissimilar messages that redundantEvents would still find correlated enough, such as messages sharing a few
+        words within a minute, are kept.
+
+        @param bands the number of bands of each signature, so that fewer bands compare fewer candidates
+        @param signatureSize the number of MinHash values of each signature, a multiple of bands
+        @param blockingKeys see redundantEvents, so that an event is only compared with the kept events of its block
+        @param blockThresholds see redundantEvents
+        @return a bytearray holding 1 for each removed event (redundant or ignored), and 0 for each kept event
+    """
+    dictionary = vocabulary(log, dictionary)
+    dictionarySize = len(dictionary)
+    tokens = dictionary.tokenizeLog(log)
+    timestamps = eventTimestamps(log)
+    removed = ignoredEvents(log)
+    blocks = eventBlocks(log, blockingKeys)
+    blockThresholds = blockThresholds or {}
+
+    minHash = MinHash(signatureSize)
+    bandKeys = {}
+
+    # The kept events of the last 20 minutes, oldest first, and the kept events of each block with each band key,
+    #   oldest first
+    kept = deque()
+    buckets = {}
+
+    for j in xrange(len(log)):
+        if removed[j]:
+            continue
+
+        # Forget the kept events that are too old to make this or any later event redundant, which are the oldest
+        #   events of each of their buckets
+        logJDate = timestamps[j]
+        while kept and logJDate - timestamps[kept[0]] > HORIZON:
+            i = kept.popleft()
+            for key in bandKeys[id(tokens[i])]:
+                bucket = buckets[blocks[i], key]
+                bucket.popleft()
+                if not bucket:
+                    del buckets[blocks[i], key]
+
+        # Events with the same message share the same token array, and so the same band keys
+        keys = bandKeys.get(id(tokens[j]))
+        if keys is None:
+            keys = bandKeys[id(tokens[j])] = minHash.bands(minHash.signature(tokens[j]), bands)
+        block = blocks[j]
+
+        candidates = set()
+        for key in keys:
+            candidates.update(buckets.get((block, key), ()))
+
+        requiredCorrelation = blockThresholds.get(block, getRequiredCorrelation)
+        for i in sorted(candidates):
+            if requiredCorrelation is getRequiredCorrelation and tokens[i] is tokens[j]:
+                removed[j] = 1
+                break
+            timeDiff = (logJDate - timestamps[i]) / 1000000.0
+            requiredCorr = requiredCorrelation(timeDiff)
+            corr = PearsonCorrelation.tokenCorrelation(tokens[i], tokens[j], dictionarySize)
             if (corr > requiredCorr):
-                log[j]['CAT'] = "ignore" # deleting this log
+                removed[j] = 1
+                break
+        else:
+            kept.append(j)
+            for key in keys:
+                buckets.setdefault((block, key), deque()).append(j)
+
+    return removed
+
+def subLog(log, indices):
+    """
+      Gets the events of a log at the given indices, in that order, as a list or as a new EventTable
+    """
+    if isinstance(log, EventTable):
+        return log.take(indices)
+    return [log[i] for i in indices]
+
+def filterPartition(task):
+    """
+      Finds the removed events of one partition of a log, as a task of parallelRedundantEvents
+    """
+    removedEvents, log, dictionary, options = task
+    return removedEvents(log, dictionary, **options)
+
+def parallelRedundantEvents(log, dictionary=None, processes=None, removedEvents=redundantEvents, partitions=None,
+                            **options):
+    """
+      Finds the same events as <code>removedEvents</code>, splitting the log into consecutive time partitions that are
+        filtered by a pool of processes. Each partition is filtered along with the 20 minutes of events before it, which
+        stand in for the kept events of the previous partitions. The decisions of each partition are then reconciled
+        with those of the partitions before it, in order: whenever the events kept within the overlap differ from the
+        final decisions, the start of the partition is filtered again with the right kept events, until its decisions
+        agree with those of the process over a full 20 minutes. From there on, every decision only depends on events
+        that were decided the same way, so the output is identical to the sequential run. Events that are redundant
+        across a boundary are rare, so the reconciliation is usually a single comparison per boundary.
+
+        @param processes the number of processes to use, defaulting to the number of cores
+        @param removedEvents the function finding the removed events of a log, such as redundantEvents, whose options
+        must be able to be sent to the processes, see FieldPrefix
+        @param partitions the number of partitions, defaulting to the number of processes
+        @param options the keyword arguments of removedEvents, such as blockingKeys
+        @return a bytearray holding 1 for each removed event (redundant or ignored), and 0 for each kept event
+    """
+    # Every partition compares its messages over the same words
+    dictionary = vocabulary(log, dictionary)
+    timestamps = eventTimestamps(log)
+    processes = processes or cpu_count()
+    partitions = partitions or processes
+
+    # The first event of each partition, and of the 20 minutes before it
+    starts = sorted(set(len(log) * k / partitions for k in xrange(partitions + 1)))
+    overlaps = [bisect_left(timestamps, timestamps[start] - HORIZON) if start < len(log) else start for start in starts]
+
+    pool = Pool(processes)
+    try:
+        tasks = [(removedEvents, subLog(log, xrange(overlaps[k], starts[k + 1])), dictionary, options)
+                 for k in xrange(len(starts) - 1)]
+        results = pool.map(filterPartition, tasks)
+    finally:
+        pool.terminate()
+
+    removed = bytearray(len(log))
+    for k in xrange(len(starts) - 1):
+        start, end, overlap = starts[k], starts[k + 1], overlaps[k]
+        partitionRemoved = results[k]
 
-    return result
+        # The time of the last event of the overlap that the process did not decide the same way
+        lastDifference = None
+        for i in xrange(overlap, start):
+            if removed[i] != partitionRemoved[i - overlap]:
+                lastDifference = timestamps[i]
+
+        # Filter the start of the partition again, with the kept events of the overlap, until the decisions have agreed
+        #   for 20 minutes, doubling the number of events filtered again each time they have not
+        agreed = start
+        if lastDifference is not None:
+            seed = [i for i in xrange(overlap, start) if not removed[i]]
+            length = RECONCILE_SIZE
+            agreed = None
+            while agreed is None:
+                redoEnd = min(start + length, end)
+                redone = removedEvents(subLog(log, seed + range(start, redoEnd)), dictionary, **options)
+                difference = lastDifference
+                for i in xrange(start, redoEnd):
+                    if timestamps[i] - difference > HORIZON:
+                        agreed = i
+                        break
+                    removed[i] = redone[len(seed) + i - start]
+                    if removed[i] != partitionRemoved[i - overlap]:
+                        difference = timestamps[i]
+                else:
+                    if redoEnd == end:
+                        agreed = end
+                length *= 2
+
+        removed[agreed:end] = partitionRemoved[agreed - overlap:end - overlap]
+
+    return removed
+
+def filter(log, dictionary=None, batchSize=None, lsh=False, blockingKeys=None, blockThresholds=None, processes=None,
+           progress=False):
+    """
+      Removes redundant events, i.e. events whose message is correlated to an earlier, kept event within 20 minutes.
+        The log may be a list of dictionaries or a columnar EventTable sorted by time, and is not modified. Each message
+        is only tokenized once, see Vocabulary.tokenizeLog, and each event is only compared with the kept events of the
+        previous 20 minutes, see redundantEvents.
+
+        @param dictionary the words the messages are compared over, as a set of words or a Vocabulary, or None to
+        compare them over every word of the log
+        @param batchSize the number of events to score at once, see batchedRedundantEvents, or None to score them one
+        at a time
+        @param lsh only compares the events whose messages are likely near-duplicates, see lshRedundantEvents, which is
+        faster during alert storms but may keep some events that would otherwise be found redundant
+        @param blockingKeys the fields or functions of an event that an event must share with an earlier event to be
+        compared with it, see eventBlocks, such as ['CAT', FieldPrefix('LOCATION', 3)], or None to compare every pair
+        of events
+        @param blockThresholds the function giving the required correlation at a time difference in seconds of each
+        block, for the blocks that do not use getRequiredCorrelation
+        @param processes filters the log in parallel with this many processes, see parallelRedundantEvents
+        @param progress prints the percentage of the log filtered so far, when it is filtered one event at a time by a
+        single process
+        @return the kept events, as an EventTable for an EventTable log, or as a list of its dictionaries otherwise
+    """
+    if lsh:
+        removedEvents, options = lshRedundantEvents, {}
+    elif batchSize:
+        removedEvents, options = batchedRedundantEvents, {'batchSize': batchSize}
+    else:
+        removedEvents, options = redundantEvents, {}
+    options.update(blockingKeys=blockingKeys, blockThresholds=blockThresholds)
+
+    if processes is not None and processes > 1:
+        removed = parallelRedundantEvents(log, dictionary, processes, removedEvents, **options)
+    elif removedEvents is redundantEvents:
+        removed = redundantEvents(log, dictionary, progress=progress, **options)
+    else:
+        removed = removedEvents(log, dictionary, **options)
+    keptIndices = [i for i in xrange(len(log)) if not removed[i]]
+    if isinstance(log, EventTable):
+        return log.take(keptIndices)
+    return [log[i] for i in keptIndices]
+
+def iterFilter(log, dictionary, blockingKeys=None, blockThresholds=None):
+    """
+      Removes redundant events from a stream of events in time order, such as the entries yielded by a parser,
+        yielding the events that are kept. Whether an event is redundant only depends on the kept events before it, so
+        each kept event is yielded as soon as it is read. Only the timestamps and token arrays of the kept events of the
+        last 20 minutes are held, so the memory used is bounded by the busiest 20 minutes rather than by the size of
+        the log. The same events are kept as by filter with the same dictionary.
+
+        @param dictionary the words the messages are compared over, as a set of words or a Vocabulary, which is
+        required since the words of the whole stream are not known in advance, and is never grown so that the
+        correlations of later events are not skewed by the words of earlier ones
+        @param blockingKeys see redundantEvents
+        @param blockThresholds see redundantEvents
+    """
+    if dictionary is None:
+        raise ValueError("A dictionary is required to filter a stream of events")
+    dictionary = vocabulary(None, dictionary)
+    dictionarySize = len(dictionary)
+    blockThresholds = blockThresholds or {}
+
+    # The (timestamp, block) of the kept events of the last 20 minutes, oldest first
+    kept = deque()
+
+    # The (timestamp, tokens) of the kept events of each block, oldest first, and the number of them with each set of
+    #   tokens, which are identical for identical token arrays
+    keptEvents = {}
+    keptEventTokens = {}
+
+    for entry in log:
+        if entry['CAT'] == "ignore":
+            continue
+
+        # Forget the kept events that are too old to make this or any later event redundant, which are the oldest
+        #   events of their blocks
+        logJDate = ParserUtil.recordTimestamp(entry)
+        while kept and logJDate - kept[0][0] > HORIZON:
+            oldBlock = kept.popleft()[1]
+            tokensKey = keptEvents[oldBlock].popleft()[1].tostring()
+            keptEventTokens[oldBlock][tokensKey] -= 1
+            if keptEventTokens[oldBlock][tokensKey] == 0:
+                del keptEventTokens[oldBlock][tokensKey]
+            if not keptEvents[oldBlock]:
+                del keptEvents[oldBlock]
+                del keptEventTokens[oldBlock]
+
+        tokens = dictionary.tokenize(entry['MESSAGE'])
+        block = eventBlock(entry, blockingKeys)
+        blockKept = keptEvents.get(block, ())
+        keptTokens = keptEventTokens.get(block, {})
+
+        requiredCorrelation = blockThresholds.get(block, getRequiredCorrelation)
+        if requiredCorrelation is getRequiredCorrelation and tokens.tostring() in keptTokens:
+            continue
+
+        for keptDate, keptTokensArray in blockKept:
+            timeDiff = (logJDate - keptDate) / 1000000.0
+            requiredCorr = requiredCorrelation(timeDiff)
+            corr = PearsonCorrelation.tokenCorrelation(keptTokensArray, tokens, dictionarySize)
+            if (corr > requiredCorr):
+                break
+        else:
+            kept.append((logJDate, block))
+            keptEvents.setdefault(block, deque()).append((logJDate, tokens))
+            keptTokens = keptEventTokens.setdefault(block, {})
+            keptTokens[tokens.tostring()] = keptTokens.get(tokens.tostring(), 0) + 1
+            yield entry
 
 
 def main():
     projectRoot = os.environ['PROJECT_ROOT']
     log = parse(projectRoot + '/log/bg.comb')
 
-    dictionary = set()
-    for line in log:
-        for word in line["MESSAGE"].split(" "):
-            dictionary.add(word)
+    dictionary = Vocabulary.fromLog(log)
 
     print len(dictionary)
     print len(log)
-    newLog = filter(log, dictionary)
+    newLog = filter(log, dictionary, progress=True)
     print len(newLog)
 
 if __name__ == '__main__':
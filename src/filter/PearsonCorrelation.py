@@ -1,35 +1,125 @@
 import math
+import numpy
+from src.parser.Vocabulary import DELIMITER, Vocabulary
 
 __author__ = 'Roman'
 
 def correlation(log1, log2, dictionary):
-    log1Set = set()
-    for word in log1["MESSAGE"].split(" "):
-        log1Set.add(word)
-
-    log2Set = set()
-    for word in log2["MESSAGE"].split(" "):
-        log2Set.add(word)
-
-    p00 = 0
-    p01 = 0
-    p10 = 0
-    p11 = 0
-
-    for word in dictionary:
-        if word in log1Set and word in log2Set:
-            p11 += 1
-        elif word in log1Set and not word in log2Set:
-            p01 += 1
-        elif not word in log1Set and word in log2Set:
-            p10 += 1
-        elif not word in log1Set and not word in log2Set:
-            p00 += 1
+    """
+      Computes the correlation of the messages of two events over the words of a dictionary, see tokenCorrelation.
+        Filtering a whole log should tokenize each message once instead, see Filterer.filter.
+
+        @param dictionary the set of words to compare, or the Vocabulary mapping them to token ids
+    """
+    if isinstance(dictionary, Vocabulary):
+        tokens1, tokens2 = dictionary.tokenizeLog([log1, log2])
+        return tokenCorrelation(tokens1, tokens2, len(dictionary))
+
+    words1 = set(word for word in log1['MESSAGE'].split(DELIMITER) if word in dictionary)
+    words2 = set(word for word in log2['MESSAGE'].split(DELIMITER) if word in dictionary)
+    p11 = len(words1 & words2)
+    return tableCorrelation(p11, len(words1), len(words2), len(dictionary), p11 == len(words1) == len(words2))
+
+def bitset(tokens):
+    """
+      Packs the token ids of a message into an integer, with one bit set per token, see tokenCorrelation
+    """
+    packed = 0
+    for token in tokens:
+        packed |= 1 << token
+    return packed
+
+def popcount(packed):
+    return bin(packed).count('1')
+
+def tokenCorrelation(tokens1, tokens2, dictionarySize):
+    """
+      Computes the Pearson correlation (phi coefficient) of two messages over the words of a dictionary, from the
+        2x2 table of the number of words occurring in both, either or neither of them. The table follows from the
+        sizes of the two token sets and of their intersection, so this takes O(|tokens1| + |tokens2|) time, however
+        large the dictionary is.
+
+      When one of the messages holds no word of the dictionary, or every word of it, the correlation is undefined.
+        Identical messages are then taken to be perfectly correlated (1.0), and other messages to be uncorrelated (0.0).
+
+        @param tokens1 the token ids of the first message, either as a sorted array (see Vocabulary.tokenize) or as a
+        packed integer bitset (see bitset)
+        @param tokens2 the token ids of the second message, in the same form
+        @param dictionarySize the number of words in the dictionary
+    """
+    if isinstance(tokens1, (int, long)):
+        p11 = popcount(tokens1 & tokens2)
+        size1 = popcount(tokens1)
+        size2 = popcount(tokens2)
+        identical = tokens1 == tokens2
+    else:
+        p11 = len(frozenset(tokens1).intersection(tokens2))
+        size1 = len(tokens1)
+        size2 = len(tokens2)
+        identical = p11 == size1 == size2
+    return tableCorrelation(p11, size1, size2, dictionarySize, identical)
+
+def tableCorrelation(p11, size1, size2, dictionarySize, identical):
+    """
+      Computes the correlation of two messages from the number of words they share and the number of words of each,
+        see tokenCorrelation
+
+        @param identical whether the two messages hold the same words, for when the correlation is undefined
+    """
+    # Words in only the first message, only the second one, or neither
+    p01 = size1 - p11
+    p10 = size2 - p11
+    p00 = dictionarySize - p11 - p01 - p10
+
+    p0plus = p00 + p01
+    p1plus = p10 + p11
+    pplus0 = p00 + p10
+    pplus1 = p01 + p11
+
+    denominator = p0plus * p1plus * pplus0 * pplus1
+    if denominator == 0:
+        return 1.0 if identical else 0.0
+
+    corr = (p00 * p11 - p01 * p10) / math.sqrt(denominator)
+    return corr
+
+def correlationMatrix(tokensList1, tokensList2, dictionarySize):
+    """
+      Computes the correlation of every message of a list with every message of another at once, with the same results
+        as tokenCorrelation. The messages are stored as binary message-by-word matrices over only the words they hold,
+        so that a single matrix product gives the sizes of all of the intersections, and the correlations are then
+        computed as arrays.
+
+        @param tokensList1 the sorted token ids of each message of the first list, see Vocabulary.tokenize
+        @param tokensList2 the sorted token ids of each message of the second list
+        @param dictionarySize the number of words in the dictionary
+        @return the numpy array of the correlation of each message of the first list (rows) with each message of the
+        second list (columns)
+    """
+    tokensList = list(tokensList1) + list(tokensList2)
+    sizes = numpy.array([len(tokens) for tokens in tokensList], dtype=numpy.int64)
+    rows = len(tokensList) - len(tokensList2)
+    if sizes.sum() > 0:
+        words, columns = numpy.unique(numpy.concatenate(tokensList).astype(numpy.int64), return_inverse=True)
+        matrix = numpy.zeros((len(tokensList), len(words)), dtype=numpy.float32)
+        matrix[numpy.repeat(numpy.arange(len(tokensList)), sizes), columns] = 1
+        p11 = numpy.rint(matrix[:rows].dot(matrix[rows:].T)).astype(numpy.int64)
+    else:
+        p11 = numpy.zeros((rows, len(tokensList2)), dtype=numpy.int64)
+
+    # Words in only the first message, only the second one, or neither
+    p01 = sizes[:rows, None] - p11
+    p10 = sizes[None, rows:] - p11
+    p00 = dictionarySize - p11 - p01 - p10
 
     p0plus = p00 + p01
     p1plus = p10 + p11
     pplus0 = p00 + p10
     pplus1 = p01 + p11
 
-    corr = (p00 * p11 - p01 * p10) / math.sqrt(p0plus * p1plus * pplus0 * pplus1)
+    # Each pair of factors is exact as a float, so the denominator is rounded once, as in tokenCorrelation
+    denominator = (p0plus * p1plus).astype(numpy.float64) * (pplus0 * pplus1).astype(numpy.float64)
+    defined = denominator > 0
+    corr = numpy.where((p01 == 0) & (p10 == 0), 1.0, 0.0)
+    corr[defined] = (p00 * p11 - p01 * p10)[defined] / numpy.sqrt(denominator[defined])
     return corr
\ No newline at end of file
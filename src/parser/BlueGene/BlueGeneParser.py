@@ -1,55 +1,144 @@
 import os
-from src.parser import RegexParser, ParserUtil
+from src.parser import RegexParser, ParserUtil, ParsedLogCache, LogReader, TimeIndex, ExternalSort
+from src.parser.Vocabulary import Vocabulary
+from src.parser.EventTable import EventTable
 
 __author__ = 'Roman'
 
+# Describes the order in which the keys appear in the log, along with the regular expression for each
+LOG_KEYS = [
+    ('CAT', "\w+|-"),
+    ('UTIME', "\d+"),
+    ('DATE', "[\d.]+"),
+    ('SOURCE', "\S+"),
+    ('EVENT_TIME', "[\d.-]+"),
+    ('SOURCE2', "\S+"),
+    ('FIELD1', "\w+"),
+    ('FIELD2', "\w+"),
+    ('SEVERITY', "\w+"),
+    ('MESSAGE', ".*")
+]
+
+# The severities of the events to keep
+SEVERITY_KEYS = ["INFO", "FAILURE", "SEVERE", "WARNING", "ERROR", "FATAL"]
+
 def cleanse(parsed, key, values):
-    ret = []
+    return list(iterCleanse(parsed, key, values))
+
+def iterCleanse(parsed, key, values):
+    """
+        Lazily filters the parsed log, keeping only entries whose value for <code>key</code> is in <code>values</code>
+    """
     for line in parsed:
         if line[key] in values:
-            ret.append(line)
-    return ret
+            yield line
+
+def severityPredicates(predicates):
+    """
+        Adds the severity filter to the given field predicates, so that the entries with other severities are
+        rejected before they are built, rather than being cleansed afterwards
+    """
+    predicates = dict(predicates or {})
+    severities = predicates.get('SEVERITY')
+    if severities is None:
+        predicates['SEVERITY'] = SEVERITY_KEYS
+    elif callable(severities):
+        predicates['SEVERITY'] = ParserUtil.AllOf(SEVERITY_KEYS, severities)
+    else:
+        predicates['SEVERITY'] = [severity for severity in SEVERITY_KEYS if severity in severities]
+    return predicates
+
+def projectedFields(fields, templateMiner=None):
+    """
+        Adds the fields that iterParse itself reads to the given field projection: the EVENT_TIME, which is decoded
+        into the EVENT_TIMESTAMP, and the MESSAGE when a template miner is given
+    """
+    if fields is None:
+        return None
+    fields = list(fields)
+    if 'EVENT_TIME' not in fields:
+        fields.append('EVENT_TIME')
+    if templateMiner is not None and 'MESSAGE' not in fields:
+        fields.append('MESSAGE')
+    return fields
 
-def parse(logFilePath):
+def parse(logFilePath, columnar=False, processes=None, cacheDirectory=None, predicates=None, fields=None, start=None,
+          end=None, sort=False, templateMiner=None):
     """
         Parses Blue Gene Logs, found here: http://www.cs.sandia.gov/~jrstear/logs/
+        The log may be compressed with gzip, bzip2 or xz, as they are distributed.
+
+        @param columnar returns the log as a columnar <code>EventTable</code> instead of a list of dictionaries
+        @param processes parses the log in parallel with this many processes
+        @param cacheDirectory caches the parsed log in this directory, returning it as a memory-mapped
+        <code>EventTable</code> that is only parsed again once the log file changes. The predicates must then be
+        collections of values, TimeRange or AllOf, see ParserUtil.predicateSpec
+        @param predicates keeps only the entries whose fields pass these predicates, such as a set of CAT values or
+        a ParserUtil.TimeRange on EVENT_TIME, which are checked before the entries are built, see
+        RegexParser.buildMatcher
+        @param fields keeps only these fields in each entry, along with the EVENT_TIME every entry is ordered by,
+        or None to keep every field. The other fields are matched without being captured.
+        @param start keeps only the entries whose EVENT_TIME is within [start, end), reading only the part of the log
+        that may hold them, see RegexParser.parse
+        @param sort sorts the entries by time, for logs with out-of-order entries. The order is checked once the log
+        is read, and a log already in order is returned unchanged, see ExternalSort.sortIfNeeded
+        @param templateMiner adds the id of the template of each MESSAGE, mined by this TemplateMiner in the order the
+        entries are returned, as an integer TEMPLATE_ID field. The ids depend on the templates the miner has already
+        learned, so they are not cached: the log loaded from the cache is mined again, and returned as an
+        <code>EventTable</code> in memory.
     """
-    logKeys = [
-        ('CAT', "\w+|-"),
-        ('UTIME', "\d+"),
-        ('DATE', "[\d.]+"),
-        ('SOURCE', "\S+"),
-        ('EVENT_TIME', "[\d.-]+"),
-        ('SOURCE2', "\S+"),
-        ('FIELD1', "\w+"),
-        ('FIELD2', "\w+"),
-        ('SEVERITY', "\w+"),
-        ('MESSAGE', ".*")
-    ]
-
-    severityKeys = ["INFO", "FAILURE", "SEVERE", "WARNING", "ERROR", "FATAL"]
-
-    def input():
-        """
-            The input to parse. Note that we do not want to strip the lines
-        """
-        with open(logFilePath, "rb") as logFile:
-            for line in logFile:
-                yield line
-
-    parsed = RegexParser.parseInput(input(), logKeys)
-    return cleanse(parsed, "SEVERITY", severityKeys);
+    fields = projectedFields(fields, templateMiner)
+
+    def parseLog(path, columnar):
+        log = iterParse(path, processes, predicates, fields, start, end)
+        return ExternalSort.sortIfNeeded(log, columnar) if sort else log
+
+    if cacheDirectory is not None:
+        log = ParsedLogCache.load(logFilePath, ('BlueGene', LOG_KEYS, SEVERITY_KEYS,
+                                                ParserUtil.predicateSpec(predicates), fields,
+                                                ParserUtil.TimeRange(start, end), sort),
+                                  lambda path: parseLog(path, True), cacheDirectory)
+        if templateMiner is None:
+            return log
+        return EventTable.fromRecords(templateMiner.iterMine(dict(entry.iteritems()) for entry in log))
+
+    log = parseLog(logFilePath, columnar and templateMiner is None)
+    if templateMiner is not None:
+        log = templateMiner.iterMine(log)
+    if isinstance(log, EventTable):
+        return log
+    return EventTable.fromRecords(log) if columnar else list(log)
+
+def iterParse(logFilePath, processes=None, predicates=None, fields=None, start=None, end=None, templateMiner=None):
+    """
+        Lazily parses Blue Gene Logs, yielding one log entry at a time. See parse for more information.
+        The EVENT_TIME of each entry is decoded once here, into its EVENT_TIMESTAMP field.
+    """
+    predicates = severityPredicates(predicates)
+    fields = projectedFields(fields, templateMiner)
+    parsed = iterParseEvents(logFilePath, processes, predicates, fields, start, end)
+    return templateMiner.iterMine(parsed) if templateMiner is not None else parsed
+
+def iterParseEvents(logFilePath, processes, predicates, fields, start, end):
+    """
+        Helper function to parse the events of iterParse, with their EVENT_TIMESTAMP field
+    """
+    if processes is not None and processes > 1:
+        parsed = RegexParser.iterParallelParse(logFilePath, LOG_KEYS, processes=processes, stripLines=False,
+                                               predicates=predicates, fields=fields, start=start, end=end)
+        return ParserUtil.iterDecodeTimestamps(parsed)
+
+    # Note that we do not want to strip the lines
+    startOffset, lineNumber, endOffset = TimeIndex.seek(logFilePath, start, end)
+    parsed = RegexParser.iterParseInput(LogReader.readLines(logFilePath, startOffset, endOffset), LOG_KEYS,
+                                        predicates=ParserUtil.withTimeRange(predicates, start, end), fields=fields)
+    return ParserUtil.iterDecodeTimestamps(parsed)
 
 def main():
     projectRoot = os.environ['PROJECT_ROOT']
     log = parse(projectRoot + '/log/bg.log')
 
-    result = set()
-    for line in log:
-        for word in line["MESSAGE"].split(" "):
-            result.add(word)
-
-    print len(result)
+    print len(Vocabulary.fromLog(log))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,398 @@
+from array import array
+import json
+import os
+import numpy
+from src.parser import ParserUtil
+
+__author__ = 'Roman'
+
+
+def toNumpy(values, dtype):
+    """
+      Helper function to convert a growable <code>array</code> or <code>bytearray</code> into a numpy array of the
+        given type without copying it through Python objects
+    """
+    if len(values) == 0:
+        return numpy.zeros(0, dtype=dtype)
+    elif isinstance(values, bytearray):
+        return numpy.frombuffer(str(values), dtype=dtype)
+    return numpy.frombuffer(values, dtype=numpy.dtype('i%d' % values.itemsize)).astype(dtype)
+
+def toJson(value):
+    """
+      Helper function to save a parsed value in a JSON sidecar. Byte strings are saved as latin-1, which maps every
+        byte to one character, so that values that are not valid UTF-8 are kept as they are
+    """
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return value.decode('latin-1') if isinstance(value, str) else value
+
+def fromJson(value):
+    """
+      Helper function to load a value saved by toJson. JSON strings are loaded as unicode, but parsed values are byte
+        strings
+    """
+    return value.encode('latin-1') if isinstance(value, unicode) else value
+
+
+class EventTable(object):
+    """
+      Columnar, dictionary-encoded representation of a parsed log. Instead of one dictionary per log event, this stores:
+
+        - the timestamp column (EVENT_TIME) as int64 microseconds since the epoch
+        - every other column as an array of integer codes, with one list of distinct values (a dictionary) per column
+        - free text columns (MESSAGE) as one contiguous byte buffer plus offsets, so that each string is only
+          materialized when it is accessed
+
+      An EVENT_TIMESTAMP field decoded at parse time (see <code>ParserUtil.TIMESTAMP_KEY</code>) is stored as the
+        timestamp column itself, rather than being decoded again.
+
+      Most of the fields in the RAS logs have a very low cardinality, so this is many times smaller than a list of
+        dictionaries. Indexing a table with an integer returns a dictionary-like <code>EventTableRow</code>, and
+        slicing it returns another table sharing the same underlying arrays, so existing strategies can iterate over it
+        unchanged while table-aware code can use the columns directly.
+    """
+
+    def __init__(self, columns, timestamps, codes, dictionaries, textOffsets, textData, timeKey='EVENT_TIME'):
+        """
+          Creates a table from its columns. Use <code>fromRecords</code> to build a table from parsed log entries.
+
+            @param  columns         The names of the columns, in their original order
+            @param  timestamps      The int64 numpy array of timestamps, or None if the table has no time column
+            @param  codes           Dictionary of column name -> numpy array of integer codes
+            @param  dictionaries    Dictionary of column name -> list of distinct values, indexed by code
+            @param  textOffsets     Dictionary of text column name -> numpy array of (number of rows + 1) byte offsets
+            @param  textData        Dictionary of text column name -> numpy uint8 array holding all of its strings
+            @param  timeKey         The name of the time column
+        """
+
+        self.columns = columns
+        self.timestamps = timestamps
+        self.codes = codes
+        self.dictionaries = dictionaries
+        self.textOffsets = textOffsets
+        self.textData = textData
+        self.timeKey = timeKey
+
+        self.lookups = {}
+        self.sorted = None
+
+
+    @classmethod
+    def fromRecords(cls, records, timeKey='EVENT_TIME', textKeys=('MESSAGE',)):
+        """
+          Builds a table from an iterable of parsed log entries in a single pass, so that a parser generator can be
+            consumed without ever holding the full list of dictionaries in memory.
+
+            @param  records     The parsed log entries, all of which are expected to have the same keys
+            @param  timeKey     The name of the timestamp field, stored as microseconds since the epoch
+            @param  textKeys    The names of the free text fields, which are stored without dictionary encoding
+        """
+
+        columns = None
+        decoded = False
+        timestamps = array('l')
+        codes = {}
+        dictionaries = {}
+        lookups = {}
+        textOffsets = {}
+        textData = {}
+
+        for record in records:
+
+            # The first entry determines the layout of the table
+            if columns is None:
+                columns = list(record.keys())
+                decoded = ParserUtil.TIMESTAMP_KEY in columns
+                for key in columns:
+                    if key in textKeys:
+                        textOffsets[key] = array('l', [0])
+                        textData[key] = bytearray()
+                    elif key != timeKey and key != ParserUtil.TIMESTAMP_KEY:
+                        codes[key] = array('i')
+                        dictionaries[key] = []
+                        lookups[key] = {}
+
+            for key in columns:
+                value = record[key]
+                if key == ParserUtil.TIMESTAMP_KEY:
+                    timestamps.append(value)
+                elif key == timeKey:
+                    if not decoded:
+                        timestamps.append(ParserUtil.eventTimestamp(value))
+                elif key in textData:
+                    if isinstance(value, unicode):
+                        value = value.encode('utf-8')
+                    textData[key].extend(value)
+                    textOffsets[key].append(len(textData[key]))
+                else:
+                    lookup = lookups[key]
+                    code = lookup.get(value)
+                    if code is None:
+                        code = lookup[value] = len(dictionaries[key])
+                        dictionaries[key].append(value)
+                    codes[key].append(code)
+
+        if columns is None:
+            return cls([], None, {}, {}, {}, {}, timeKey)
+
+        table = cls(columns,
+                    toNumpy(timestamps, numpy.int64) if timeKey in columns or decoded else None,
+                    dict((key, toNumpy(value, numpy.int32)) for key, value in codes.iteritems()),
+                    dictionaries,
+                    dict((key, toNumpy(value, numpy.int64)) for key, value in textOffsets.iteritems()),
+                    dict((key, toNumpy(value, numpy.uint8)) for key, value in textData.iteritems()),
+                    timeKey)
+        table.lookups = lookups
+        return table
+
+
+    def __len__(self):
+        if self.timestamps is not None:
+            return len(self.timestamps)
+        for column in self.codes.itervalues():
+            return len(column)
+        for offsets in self.textOffsets.itervalues():
+            return len(offsets) - 1
+        return 0
+
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield EventTableRow(self, index)
+
+
+    def __getitem__(self, index):
+        """
+          Returns the row at the given index, or a table view of the rows in the given slice
+        """
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise IndexError('EventTable only supports contiguous slices')
+            stop = max(start, stop)
+            return EventTable(self.columns,
+                              self.timestamps[start:stop] if self.timestamps is not None else None,
+                              dict((key, column[start:stop]) for key, column in self.codes.iteritems()),
+                              self.dictionaries,
+                              dict((key, offsets[start:stop + 1]) for key, offsets in self.textOffsets.iteritems()),
+                              self.textData,
+                              self.timeKey)
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('EventTable index out of range')
+        return EventTableRow(self, index)
+
+
+    def take(self, indices):
+        """
+          Returns a new table holding the rows at the given indices, in that order
+        """
+
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        textOffsets = {}
+        textData = {}
+        for key, offsets in self.textOffsets.iteritems():
+            starts = offsets[:-1][indices]
+            lengths = offsets[1:][indices] - starts
+            newOffsets = numpy.zeros(len(indices) + 1, dtype=numpy.int64)
+            numpy.cumsum(lengths, out=newOffsets[1:])
+            data = self.textData[key]
+            textData[key] = toNumpy(bytearray(''.join(data[start:start + length].tostring()
+                                                      for start, length in zip(starts, lengths))), numpy.uint8)
+            textOffsets[key] = newOffsets
+
+        return EventTable(self.columns,
+                          self.timestamps[indices] if self.timestamps is not None else None,
+                          dict((key, column[indices]) for key, column in self.codes.iteritems()),
+                          self.dictionaries,
+                          textOffsets,
+                          textData,
+                          self.timeKey)
+
+
+    def keys(self):
+        return list(self.columns)
+
+
+    def value(self, key, index):
+        """
+          Decodes a single value of the table
+        """
+
+        if key == self.timeKey and self.timestamps is not None:
+            return ParserUtil.eventTime(int(self.timestamps[index]))
+        elif key == ParserUtil.TIMESTAMP_KEY and self.timestamps is not None:
+            return int(self.timestamps[index])
+        elif key in self.codes:
+            return self.dictionaries[key][self.codes[key][index]]
+        elif key in self.textOffsets:
+            offsets = self.textOffsets[key]
+            return self.textData[key][offsets[index]:offsets[index + 1]].tostring()
+        raise KeyError(key)
+
+
+    def code(self, key, value):
+        """
+          Finds the integer code for a value of a dictionary-encoded column, or None if the value never occurs
+        """
+
+        if key not in self.lookups:
+            self.lookups[key] = dict((entry, code) for code, entry in enumerate(self.dictionaries[key]))
+        return self.lookups[key].get(value)
+
+
+    def valueCounts(self, key):
+        """
+          Counts the occurrences of each value of a dictionary-encoded column, using a single vectorized pass over its codes
+
+            @return A dictionary of value -> number of rows holding it, omitting values that do not occur
+        """
+
+        counts = numpy.bincount(self.codes[key], minlength=len(self.dictionaries[key]))
+        dictionary = self.dictionaries[key]
+        return dict((dictionary[code], int(count)) for code, count in enumerate(counts) if count > 0)
+
+
+    def isSorted(self):
+        """
+          Checks whether the rows are ordered by timestamp
+        """
+
+        if self.sorted is None:
+            self.sorted = self.timestamps is None or bool(numpy.all(self.timestamps[1:] >= self.timestamps[:-1]))
+        return self.sorted
+
+
+    def sortedByTime(self):
+        """
+          Returns the table with its rows ordered by timestamp, which is the table itself if they already are. The sort
+            is stable, so rows with the same timestamp keep their order.
+        """
+
+        if self.isSorted():
+            return self
+        table = self.take(numpy.argsort(self.timestamps, kind='mergesort'))
+        table.sorted = True
+        return table
+
+
+    def save(self, directory):
+        """
+          Saves the table to the given directory, with one .npy file per column and a JSON sidecar holding the column
+            names and dictionaries, so that it can be memory-mapped by <code>load</code>
+        """
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        sidecar = {
+            'columns': [toJson(key) for key in self.columns],
+            'timeKey': toJson(self.timeKey),
+            'dictionaries': dict((toJson(key), [toJson(value) for value in values])
+                                 for key, values in self.dictionaries.iteritems()),
+            'sorted': self.isSorted()
+        }
+
+        if self.timestamps is not None:
+            numpy.save(os.path.join(directory, 'timestamps.npy'), self.timestamps)
+        for index, key in enumerate(self.columns):
+            if key in self.codes:
+                numpy.save(os.path.join(directory, 'codes-%d.npy' % index), self.codes[key])
+            elif key in self.textOffsets:
+                numpy.save(os.path.join(directory, 'textOffsets-%d.npy' % index), self.textOffsets[key])
+                numpy.save(os.path.join(directory, 'textData-%d.npy' % index), self.textData[key])
+
+        # The sidecar is written last, marking the table as complete
+        with open(os.path.join(directory, 'table.json'), 'w') as sidecarFile:
+            json.dump(sidecar, sidecarFile)
+
+
+    @classmethod
+    def load(cls, directory, mmapMode='r'):
+        """
+          Loads a table saved by <code>save</code>. By default the columns are memory-mapped read-only, so loading does
+            no parsing and creates no per-row Python objects.
+        """
+
+        with open(os.path.join(directory, 'table.json')) as sidecarFile:
+            sidecar = json.load(sidecarFile)
+
+        def column(name):
+            try:
+                return numpy.load(os.path.join(directory, name), mmap_mode=mmapMode)
+            except ValueError:
+                # Empty columns cannot be memory-mapped
+                return numpy.load(os.path.join(directory, name))
+
+        columns = [fromJson(key) for key in sidecar['columns']]
+        timeKey = fromJson(sidecar['timeKey'])
+        dictionaries = dict((fromJson(key), [fromJson(value) for value in values])
+                            for key, values in sidecar['dictionaries'].iteritems())
+        codes = {}
+        textOffsets = {}
+        textData = {}
+        for index, key in enumerate(columns):
+            if key in dictionaries:
+                codes[key] = column('codes-%d.npy' % index)
+            elif key != timeKey and key != ParserUtil.TIMESTAMP_KEY:
+                textOffsets[key] = column('textOffsets-%d.npy' % index)
+                textData[key] = column('textData-%d.npy' % index)
+
+        timestamps = column('timestamps.npy') if timeKey in columns or ParserUtil.TIMESTAMP_KEY in columns else None
+        table = cls(columns, timestamps, codes, dictionaries, textOffsets, textData, timeKey)
+        table.sorted = sidecar['sorted']
+        return table
+
+
+class EventTableRow(object):
+    """
+      Dictionary-like, read-only view of a single row of an <code>EventTable</code>, decoding values as they are accessed
+    """
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key):
+        return self.table.value(key, self.index)
+
+    def get(self, key, default=None):
+        if key in self.table.columns:
+            return self.table.value(key, self.index)
+        return default
+
+    def __contains__(self, key):
+        return key in self.table.columns
+
+    def __iter__(self):
+        return iter(self.table.columns)
+
+    def __len__(self):
+        return len(self.table.columns)
+
+    def keys(self):
+        return list(self.table.columns)
+
+    def iteritems(self):
+        for key in self.table.columns:
+            yield key, self.table.value(key, self.index)
+
+    def items(self):
+        return list(self.iteritems())
+
+    def __eq__(self, other):
+        if isinstance(other, EventTableRow):
+            return self.items() == other.items()
+        return dict(self.iteritems()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(dict(self.iteritems()))
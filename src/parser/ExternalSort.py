@@ -0,0 +1,136 @@
+import cPickle
+import os
+import shutil
+import tempfile
+from src.parser import LogMerger, ParserUtil
+from src.parser.EventTable import EventTable
+
+__author__ = 'Roman'
+
+# The number of log entries sorted in memory at a time, each of which is spilled to disk as a sorted run
+RUN_SIZE = 100000
+
+# The largest number of runs merged at once, bounding the number of open files
+MERGE_WIDTH = 64
+
+
+def writeRun(log, directory):
+    """
+      Writes log entries to a new run file in the given directory
+
+        @return The path of the run file
+    """
+
+    descriptor, runPath = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(descriptor, 'wb') as runFile:
+        for entry in log:
+            cPickle.dump(entry, runFile, cPickle.HIGHEST_PROTOCOL)
+    return runPath
+
+
+def readRun(runPath):
+    """
+      Reads back the log entries of a run file written by writeRun, deleting the file once they are all read
+    """
+
+    with open(runPath, 'rb') as runFile:
+        while True:
+            try:
+                yield cPickle.load(runFile)
+            except EOFError:
+                break
+    os.remove(runPath)
+
+
+def isSorted(log):
+    """
+      Checks whether the entries of a log are ordered by time
+    """
+
+    previous = None
+    for entry in log:
+        timestamp = ParserUtil.recordTimestamp(entry)
+        if previous is not None and timestamp < previous:
+            return False
+        previous = timestamp
+    return True
+
+
+def sortIfNeeded(log, columnar=False):
+    """
+      Reads a parsed log into memory, and sorts it by time only if it turns out to be out of order. A log already in
+        order is returned as it was read, without being sorted, copied, or spilled to disk. This is how the parsers
+        sort the logs they return, which are held in memory anyway. The sort is stable.
+
+        @param  log         The parsed log, read once
+        @param  columnar    Returns the log as an <code>EventTable</code>, sorted by its timestamp column, instead of a
+                            list
+        @return The list or <code>EventTable</code> of the entries of the log, sorted by time
+    """
+
+    if columnar:
+        return EventTable.fromRecords(log).sortedByTime()
+
+    log = list(log)
+    if not isSorted(log):
+        log.sort(key=ParserUtil.recordTimestamp)
+    return log
+
+
+def sort(log, runSize=None, temporaryDirectory=None):
+    """
+      Sorts a parsed log by time, even if it is far larger than memory. The log is read in runs of
+        <code>runSize</code> entries, each of which is sorted in memory and spilled to a temporary file, and the runs
+        are then merged back into a single stream by <code>LogMerger.merge</code>. A log that fits in a single run is
+        sorted in memory without touching the disk. The sort is stable, so entries with the same timestamp keep their
+        order. A log that is returned in memory rather than streamed is sorted more cheaply by
+        <code>sortIfNeeded</code>.
+
+      This fixes the order of logs with out-of-order entries, from clock skew or buffered writers, which would
+        otherwise be split into the wrong windows by the sliding window strategies. The sorted stream can be passed
+        to <code>EventTable.fromRecords</code>.
+
+        @param  log                 The parsed log, consumed lazily
+        @param  runSize             The number of entries sorted in memory at a time, RUN_SIZE by default
+        @param  temporaryDirectory  The directory under which the runs are spilled, the system default if None
+        @return A generator of the entries of the log, sorted by time
+    """
+
+    runSize = runSize or RUN_SIZE
+    log = iter(log)
+    directory = None
+    runs = []
+    try:
+        while True:
+            run = []
+            for entry in log:
+                # Columnar rows are copied, since they cannot be pickled
+                run.append(entry if isinstance(entry, dict) else dict(entry.iteritems()))
+                if len(run) == runSize:
+                    break
+            if not run:
+                break
+
+            run.sort(key=ParserUtil.recordTimestamp)
+            if not runs and len(run) < runSize:
+                # The whole log fits in memory
+                for entry in run:
+                    yield entry
+                return
+
+            if directory is None:
+                directory = tempfile.mkdtemp(prefix='sort-', dir=temporaryDirectory)
+            runs.append(writeRun(run, directory))
+            del run
+
+        # Merge the runs in several passes if there are too many to open at once
+        while len(runs) > MERGE_WIDTH:
+            runs = [writeRun(LogMerger.merge([readRun(runPath) for runPath in runs[index:index + MERGE_WIDTH]]),
+                             directory)
+                    for index in xrange(0, len(runs), MERGE_WIDTH)]
+
+        for entry in LogMerger.merge([readRun(runPath) for runPath in runs]):
+            yield entry
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from src.parser import LogReader
+from src.parser.ParserError import ParserError
+
+__author__ = 'Roman'
+
+# The number of bytes at the beginning of the log whose hash identifies the file, to detect a log rewritten in place
+HEAD_SIZE = 4096
+
+
+def newCheckpoint():
+    """
+      The checkpoint of a log that has not been read yet
+    """
+
+    return {
+        'device': None,
+        'inode': None,
+        'offset': 0,
+        'partial': '',
+        'lineNumber': 0,
+        'headSize': 0,
+        'head': hashlib.sha1().hexdigest()
+    }
+
+
+def loadCheckpoint(checkpointPath):
+    """
+      Loads the checkpoint saved by a previous call to readNewLines, or a new checkpoint if there is none
+    """
+
+    if not os.path.exists(checkpointPath):
+        return newCheckpoint()
+
+    with open(checkpointPath) as checkpointFile:
+        checkpoint = json.load(checkpointFile)
+    # JSON strings are loaded as unicode, but the lines are read as byte strings
+    checkpoint['partial'] = checkpoint['partial'].encode('latin-1')
+    return checkpoint
+
+
+def saveCheckpoint(checkpointPath, checkpoint):
+    """
+      Saves a checkpoint atomically, so that an interrupted save leaves the previous checkpoint intact
+    """
+
+    temporaryPath = checkpointPath + '.tmp'
+    with open(temporaryPath, 'w') as checkpointFile:
+        json.dump(dict(checkpoint, partial=checkpoint['partial'].decode('latin-1')), checkpointFile)
+    os.rename(temporaryPath, checkpointPath)
+
+
+def headHash(logFile, size):
+    """
+      Hashes the first <code>size</code> bytes of an open log file
+    """
+
+    logFile.seek(0)
+    return hashlib.sha1(logFile.read(size)).hexdigest()
+
+
+def isSameLog(checkpoint, logFile):
+    """
+      Checks whether the checkpoint still describes the open log file, i.e. whether the log has not been rotated
+        (replaced by a new file) or truncated (and possibly rewritten) since the checkpoint was saved
+    """
+
+    status = os.fstat(logFile.fileno())
+    if checkpoint['inode'] is not None and (status.st_ino, status.st_dev) != (checkpoint['inode'], checkpoint['device']):
+        return False
+    if status.st_size < checkpoint['offset']:
+        return False
+    return headHash(logFile, checkpoint['headSize']) == checkpoint['head']
+
+
+def readNewLines(logFilePath, checkpointPath, skipFirstLines=0):
+    """
+      Reads the lines appended to a growing log since the last call, using a checkpoint of the byte offset read so far
+        and of the partial last line, so that each update only reads the new data. A trailing line without a newline
+        may still be being written, so it is kept in the checkpoint and completed by a later call.
+
+      If the log has been rotated or truncated since the last call, it is read again from the beginning. Lines
+        appended to a rotated log after the last call are not read.
+
+      The checkpoint is only saved once all of the new lines have been consumed, so the lines of an interrupted read
+        are read again by the next call.
+
+        @param  checkpointPath  The file holding the checkpoint, which is created by the first call
+        @param  skipFirstLines  Skips the first lines of the log, which are only read by the first call after the log
+                                is created or rotated
+        @return A generator of the new, complete lines of the log, including their line endings
+    """
+
+    if LogReader.isCompressed(logFilePath):
+        raise ParserError("Cannot follow '%s': compressed logs cannot be read incrementally" % logFilePath)
+
+    checkpoint = loadCheckpoint(checkpointPath)
+
+    with open(logFilePath, "rb") as logFile:
+        if not isSameLog(checkpoint, logFile):
+            checkpoint = newCheckpoint()
+
+        status = os.fstat(logFile.fileno())
+        headSize = min(status.st_size, HEAD_SIZE)
+        checkpoint['inode'] = status.st_ino
+        checkpoint['device'] = status.st_dev
+        if headSize > checkpoint['headSize']:
+            checkpoint['headSize'] = headSize
+            checkpoint['head'] = headHash(logFile, headSize)
+
+        offset = checkpoint['offset']
+        partial = checkpoint['partial']
+        lineNumber = checkpoint['lineNumber']
+
+        logFile.seek(offset)
+        for line in logFile:
+            offset += len(line)
+            line = partial + line
+            if not line.endswith('\n'):
+                partial = line
+                break
+            partial = ''
+
+            lineNumber += 1
+            if lineNumber > skipFirstLines:
+                yield line
+
+    checkpoint['offset'] = offset
+    checkpoint['partial'] = partial
+    checkpoint['lineNumber'] = lineNumber
+    saveCheckpoint(checkpointPath, checkpoint)
@@ -0,0 +1,49 @@
+import heapq
+from src.parser import ParserUtil
+
+__author__ = 'Roman'
+
+
+def merge(logs, sources=False):
+    """
+      Merges several time-ordered parsed logs, such as the RAS, kernel and job logs of each rack, into a single
+        time-ordered stream. The logs are consumed lazily, with a heap holding the next entry of each log, so only one
+        entry per log is held in memory at a time. Entries with the same timestamp are yielded in the order of their
+        logs, so the merge is stable.
+
+      Any parser stream can be merged, such as those of <code>RegexParser.iterParse</code>,
+        <code>TableParser.iterParse</code> or the Blue Gene and Intrepid parsers, as long as each entry has an
+        EVENT_TIME (or an EVENT_TIMESTAMP decoded at parse time). The merged stream can be passed to
+        <code>EventTable.fromRecords</code> to build the input of a strategy without ever holding the separate logs.
+
+        @param  logs        A list of parsed logs, or a dictionary of name -> parsed log, each of which must be sorted
+                            by time
+        @param  sources     Yields a (name, entry) pair for each entry, with the name (or index in the list) of its log,
+                            rather than the entry alone. The entries themselves are never modified, so rows of an
+                            <code>EventTable</code> or compact records can be tagged as well.
+        @return A generator of the entries of all of the logs, sorted by time
+    """
+
+    if isinstance(logs, dict):
+        namedLogs = sorted(logs.iteritems())
+    else:
+        namedLogs = list(enumerate(logs))
+
+    heap = []
+    for order, (name, log) in enumerate(namedLogs):
+        log = iter(log)
+        for entry in log:
+            heap.append((ParserUtil.recordTimestamp(entry), order, entry, name, log))
+            break
+    heapq.heapify(heap)
+
+    while heap:
+        timestamp, order, entry, name, log = heap[0]
+
+        nextEntry = next(log, None)
+        if nextEntry is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (ParserUtil.recordTimestamp(nextEntry), order, nextEntry, name, log))
+
+        yield (name, entry) if sources else entry
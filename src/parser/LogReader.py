@@ -0,0 +1,145 @@
+import bz2
+import gzip
+import subprocess
+from Queue import Queue, Full
+from threading import Thread, Event
+from src.parser.ParserError import ParserError
+
+__author__ = 'Roman'
+
+# The number of lines handed from the decompression thread to the parser at a time
+BATCH_SIZE = 1024
+
+# The number of batches that may be decompressed ahead of the parser, bounding the memory used by the buffer
+BUFFER_SIZE = 64
+
+
+class XzFile(object):
+    """
+      Reads an .xz file through an <code>xz -dc</code> process, since the standard library has no lzma support. The
+        process decompresses in parallel with the parser, with the pipe between them acting as a bounded buffer.
+    """
+
+    def __init__(self, logFilePath):
+        try:
+            self.process = subprocess.Popen(['xz', '-dc', logFilePath], stdout=subprocess.PIPE, bufsize=-1)
+        except OSError:
+            raise ParserError("Cannot read '%s': the xz command is not available" % logFilePath)
+        self.logFilePath = logFilePath
+
+    def __iter__(self):
+        for line in self.process.stdout:
+            yield line
+        if self.process.wait() != 0:
+            raise ParserError("Cannot read '%s': xz exited with status %d" % (self.logFilePath, self.process.returncode))
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+# Compressed file extension -> the function opening such a file for reading
+OPENERS = {
+    '.gz': lambda logFilePath: gzip.open(logFilePath, 'rb'),
+    '.bz2': lambda logFilePath: bz2.BZ2File(logFilePath, 'rb'),
+    '.xz': XzFile
+}
+
+
+def compression(logFilePath):
+    """
+      Finds the compressed file extension of a log file, or None if the file is not compressed
+    """
+
+    for extension in OPENERS:
+        if logFilePath.endswith(extension):
+            return extension
+    return None
+
+
+def isCompressed(logFilePath):
+    return compression(logFilePath) is not None
+
+
+def readLines(logFilePath, startOffset=0, endOffset=None):
+    """
+      Reads the lines of a log file, which may be compressed with gzip (.gz), bzip2 (.bz2) or xz (.xz). Plain files are
+        read directly. Compressed files are inflated by a background thread, which feeds the lines through a bounded
+        buffer, so that decompression overlaps with parsing and the inflated log never needs to be written to disk.
+        The file is only kept open while the lines are consumed.
+
+        @param  startOffset The byte offset of the first line to read, which must be the start of a line
+        @param  endOffset   The byte offset at which to stop reading, which must be the start of a line, or None to read
+                            up to the end of the file. Both offsets only apply to plain files.
+        @return a generator of the lines of the log, including their line endings
+    """
+
+    extension = compression(logFilePath)
+    if extension is None:
+        with open(logFilePath, "rb") as logFile:
+            if startOffset > 0:
+                logFile.seek(startOffset)
+            if endOffset is None:
+                for line in logFile:
+                    yield line
+                return
+
+            offset = startOffset
+            for line in logFile:
+                if offset >= endOffset:
+                    break
+                offset += len(line)
+                yield line
+        return
+
+    if startOffset > 0 or endOffset is not None:
+        raise ParserError("Cannot seek in '%s': compressed logs can only be read from the beginning" % logFilePath)
+
+    logFile = OPENERS[extension](logFilePath)
+    buffer = Queue(BUFFER_SIZE)
+    stopped = Event()
+
+    def put(item):
+        # Gives up once the parser stops consuming, so that the thread does not block forever on a full buffer
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def decompress():
+        try:
+            batch = []
+            for line in logFile:
+                batch.append(line)
+                if len(batch) == BATCH_SIZE:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(None)
+        except Exception, error:
+            put(error)
+
+    thread = Thread(target=decompress, name='decompress ' + logFilePath)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            batch = buffer.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            for line in batch:
+                yield line
+    finally:
+        stopped.set()
+        thread.join()
+        logFile.close()
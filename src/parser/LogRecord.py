@@ -0,0 +1,138 @@
+from array import array
+
+__author__ = 'Roman'
+
+
+class RecordLayout(object):
+    """
+      The layout shared by the compact records of a parse: the names of their fields, and for tables, the column of
+        each field, so that none of it is stored per record
+    """
+
+    def __init__(self, names, columns=None, strip=False, groups=None):
+        """
+          @param  names       The names of the fields of each record, in order
+          @param  columns     The (start, end) character range of each field on every line, with an end of None for
+                              the end of the line, or None if each record holds the ranges of its own fields
+          @param  strip       Strips each field value as it is decoded
+          @param  groups      The regular expression group number of each field, for records built from matches
+        """
+
+        self.names = tuple(names)
+        self.positions = dict((name, index) for index, name in enumerate(self.names))
+        self.columns = columns
+        self.strip = strip
+        self.groups = groups
+
+        # Whether the fields are the first groups of the regular expression, in order
+        self.leadingGroups = groups is not None and list(groups) == range(1, len(groups) + 1)
+
+
+class LogRecord(object):
+    """
+      Compact representation of a parsed log entry, holding the raw line along with the character range of
+        each field, and decoding a field only when it is accessed. A record takes several times less memory than the
+        dictionary of the same entry, which holds a hash table and a separate string for every field.
+
+      Records support the dictionary-style access used by the strategies, such as <code>record['SEVERITY']</code>,
+        <code>get</code>, <code>keys</code> and <code>iteritems</code>, and compare equal to the dictionary of the same
+        entry. Fields can be added to a record, such as the EVENT_TIMESTAMP decoded at parse time, but not removed.
+    """
+
+    __slots__ = ('line', 'layout', 'spans', 'extra')
+
+    def __init__(self, line, layout, spans=None):
+        """
+          @param  line    The raw line of the log entry
+          @param  layout  The layout of the record, see RecordLayout
+          @param  spans   The array of the start and end of each field on the line, one after the other, or None if
+                          the layout has fixed columns. Fields that were not matched have a start and end of -1.
+        """
+
+        self.line = line
+        self.layout = layout
+        self.spans = spans
+        self.extra = None
+
+    @staticmethod
+    def fromMatch(match, layout):
+        """
+          Builds the record of the fields of a regular expression match on a line, see RecordLayout
+        """
+
+        regs = match.regs
+        if layout.leadingGroups:
+            offsets = sum(regs[1:len(layout.groups) + 1], ())
+        else:
+            offsets = [offset for group in layout.groups for offset in regs[group]]
+
+        # Two bytes per offset are enough for all but the longest lines
+        return LogRecord(match.string, layout, array('h' if len(match.string) < 32768 else 'i', offsets))
+
+    def __getitem__(self, key):
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+
+        layout = self.layout
+        index = layout.positions[key]
+        if self.spans is None:
+            start, end = layout.columns[index]
+            value = self.line[start:end]
+        else:
+            start = self.spans[2 * index]
+            if start < 0:
+                return None
+            value = self.line[start:self.spans[2 * index + 1]]
+        return value.strip() if layout.strip else value
+
+    def __setitem__(self, key, value):
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __contains__(self, key):
+        return key in self.layout.positions or (self.extra is not None and key in self.extra)
+
+    def keys(self):
+        keys = list(self.layout.names)
+        if self.extra is not None:
+            keys.extend(key for key in self.extra if key not in self.layout.positions)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def iteritems(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def __eq__(self, other):
+        if isinstance(other, LogRecord):
+            return dict(self.iteritems()) == dict(other.iteritems())
+        return dict(self.iteritems()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(dict(self.iteritems()))
+
+    def __getstate__(self):
+        return self.line, self.layout, self.spans, self.extra
+
+    def __setstate__(self, state):
+        self.line, self.layout, self.spans, self.extra = state
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from src.parser.EventTable import EventTable
+
+__author__ = 'Roman'
+
+# The version of the cache layout, to invalidate old caches whenever it changes
+CACHE_VERSION = 3
+
+# The number of bytes read from each end of the log file for its content hash
+HASH_BLOCK_SIZE = 1 << 20
+
+# The number of hexadecimal digits of each part of the name of a cache entry
+KEY_LENGTH = 16
+
+# The largest number of entries kept for the current state of each log file, one per field specification
+MAX_ENTRIES = 4
+
+
+def fileKey(logFilePath):
+    """
+      Computes the key of the current state of a log file, covering its size, modification time and contents, so that
+        any change to the file changes the key.
+
+      The content hash covers the first and last <code>HASH_BLOCK_SIZE</code> bytes of the file (along with its size),
+        so that computing the key does not cost a full read of a multi-GB log.
+    """
+
+    stat = os.stat(logFilePath)
+    digest = hashlib.sha1()
+    digest.update(repr((CACHE_VERSION, stat.st_size, stat.st_mtime)))
+
+    with open(logFilePath, "rb") as logFile:
+        digest.update(logFile.read(HASH_BLOCK_SIZE))
+        if stat.st_size > HASH_BLOCK_SIZE:
+            logFile.seek(max(HASH_BLOCK_SIZE, stat.st_size - HASH_BLOCK_SIZE))
+            digest.update(logFile.read())
+
+    return digest.hexdigest()[:KEY_LENGTH]
+
+
+def specKey(fieldSpec):
+    """
+      Computes the key of the field specification of a parser, which must have the same repr in every run, see
+        <code>ParserUtil.predicateSpec</code>
+    """
+
+    return hashlib.sha1(repr((CACHE_VERSION, fieldSpec))).hexdigest()[:KEY_LENGTH]
+
+
+def entryPrefix(logFilePath):
+    """
+      The prefix of the names of the cache entries of a log file, telling apart log files of the same name in
+        different directories
+    """
+
+    pathKey = hashlib.sha1(os.path.abspath(logFilePath)).hexdigest()[:KEY_LENGTH]
+    return os.path.basename(logFilePath) + '-' + pathKey + '-'
+
+
+def cacheKey(logFilePath, fieldSpec):
+    """
+      Computes the key under which the parsed log is cached. The key covers the state of the log file, see
+        <code>fileKey</code>, as well as the field specification of the parser, so any change to either invalidates the
+        cache.
+
+        @param  logFilePath The path to the log file
+        @param  fieldSpec   Any description of the parser's fields (and filters) whose repr identifies it
+    """
+
+    return fileKey(logFilePath) + '-' + specKey(fieldSpec)
+
+
+def prune(cacheDirectory, logFilePath, entryName):
+    """
+      Removes the entries of a log file that were built from an older state of the file, and all but the
+        <code>MAX_ENTRIES</code> most recently used entries of its current state
+
+        @param  entryName   The name of the entry of the current state of the log file that was just used
+    """
+
+    prefix = entryPrefix(logFilePath)
+    statePrefix = entryName[:entryName.rindex('-') + 1]
+    stale = []
+    current = []
+    for name in os.listdir(cacheDirectory):
+        if name.startswith(prefix):
+            (current if name.startswith(statePrefix) else stale).append(name)
+
+    current.sort(key=lambda name: os.path.getmtime(os.path.join(cacheDirectory, name)), reverse=True)
+    for name in stale + current[MAX_ENTRIES:]:
+        if name != entryName:
+            shutil.rmtree(os.path.join(cacheDirectory, name), ignore_errors=True)
+
+
+def load(logFilePath, fieldSpec, parseFunction, cacheDirectory):
+    """
+      Loads the parsed log from the cache as a memory-mapped <code>EventTable</code>, parsing the log and filling the cache
+        first if there is no entry for the log file in its current state. The entries of older states of the log file,
+        and its least recently used entries beyond <code>MAX_ENTRIES</code>, are then removed, see <code>prune</code>.
+
+        @param  logFilePath     The path to the log file
+        @param  fieldSpec       The field specification of the parser, see <code>cacheKey</code>
+        @param  parseFunction   The function lazily parsing the log file, given its path, or returning its
+                                <code>EventTable</code>
+        @param  cacheDirectory  The directory holding the cache entries
+    """
+
+    entryName = entryPrefix(logFilePath) + cacheKey(logFilePath, fieldSpec)
+    entryDirectory = os.path.join(cacheDirectory, entryName)
+
+    if os.path.exists(entryDirectory):
+        # Mark the entry as recently used
+        os.utime(entryDirectory, None)
+    else:
+        if not os.path.exists(cacheDirectory):
+            os.makedirs(cacheDirectory)
+
+        # Build the entry in a temporary directory first, so that an interrupted parse never leaves a partial entry
+        temporaryDirectory = tempfile.mkdtemp(dir=cacheDirectory)
+        try:
+            log = parseFunction(logFilePath)
+            table = log if isinstance(log, EventTable) else EventTable.fromRecords(log)
+            table.save(temporaryDirectory)
+            os.rename(temporaryDirectory, entryDirectory)
+        except OSError:
+            # Another process may have filled the same entry in the meantime
+            shutil.rmtree(temporaryDirectory, ignore_errors=True)
+            if not os.path.exists(entryDirectory):
+                raise
+        except:
+            shutil.rmtree(temporaryDirectory, ignore_errors=True)
+            raise
+
+    prune(cacheDirectory, logFilePath, entryName)
+    return EventTable.load(entryDirectory)
@@ -1,5 +1,25 @@
+from datetime import datetime, timedelta
+from src.parser.Sketches import HyperLogLog, SpaceSaving
+
 __author__ = 'Roman'
 
+# The format to which event timestamps are expected to adhere
+TIMESTAMP_FORMAT = "%Y-%m-%d-%H.%M.%S.%f"
+
+# The reference point for integer timestamps
+EPOCH = datetime(1970, 1, 1)
+
+# The field holding the EVENT_TIME of an event, decoded to microseconds since the epoch at parse time
+TIMESTAMP_KEY = 'EVENT_TIMESTAMP'
+
+# Caches of the date part of EVENT_TIME strings -> microseconds since the epoch at midnight, and the reverse. Logs
+#   span a limited number of days, so these stay small.
+dateTimestamps = {}
+timestampDates = {}
+
+# The number of microseconds in a day
+DAY = 86400000000
+
 
 def isNumber(string):
     """
@@ -11,6 +31,222 @@ def isNumber(string):
     except ValueError:
         return False
 
+def splitFile(logFilePath, numberOfChunks, start=0, end=None):
+    """
+      Splits a file into roughly equal byte ranges, each of which begins at the start of a line and ends just after
+        a newline (or at the end of the file)
+
+        @param  numberOfChunks  The number of ranges to split the file into (fewer are returned for small files)
+        @param  start           The offset at which the first range begins
+        @param  end             The offset at which the last range ends, which must be the start of a line, or None to
+                                split the file up to its end
+        @return A list of (start, end) byte offsets
+    """
+    with open(logFilePath, "rb") as logFile:
+        logFile.seek(0, 2)
+        size = logFile.tell() if end is None else end
+
+        chunkSize = max((size - start) / max(numberOfChunks, 1), 1)
+        chunks = []
+        while start < size:
+            logFile.seek(min(start + chunkSize, size))
+            if logFile.tell() < size:
+                logFile.readline()
+            end = logFile.tell()
+            chunks.append((start, end))
+            start = end
+        return chunks
+
+def microseconds(delta):
+    """
+      Converts a timedelta to an integer number of microseconds
+    """
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def eventTimestamp(eventTime):
+    """
+      Converts an EVENT_TIME string, formatted as <code>TIMESTAMP_FORMAT</code>, to an integer number of
+        microseconds since the epoch. Strings with the fixed 'YYYY-MM-DD-HH.MM.SS.ffffff' layout are decoded by
+        slicing, looking up the date in a cache, and falling back to strptime for anything else.
+
+        @raise ValueError if the string is not a valid timestamp
+    """
+
+    if len(eventTime) == 26 and eventTime[10] == '-' and eventTime[13] == '.' and eventTime[16] == '.' \
+            and eventTime[19] == '.':
+        date = eventTime[:10]
+        dateTimestamp = dateTimestamps.get(date)
+        if dateTimestamp is None:
+            dateTimestamp = microseconds(datetime.strptime(date, "%Y-%m-%d") - EPOCH)
+            dateTimestamps[date] = dateTimestamp
+
+        hours = int(eventTime[11:13])
+        minutes = int(eventTime[14:16])
+        seconds = int(eventTime[17:19])
+        if hours < 24 and minutes < 60 and seconds < 60:
+            return dateTimestamp + ((hours * 60 + minutes) * 60 + seconds) * 1000000 + int(eventTime[20:26])
+
+    return microseconds(datetime.strptime(eventTime, TIMESTAMP_FORMAT) - EPOCH)
+
+def eventTime(timestamp):
+    """
+      Converts an integer number of microseconds since the epoch back to an EVENT_TIME string
+    """
+
+    days, timeOfDay = divmod(timestamp, DAY)
+    date = timestampDates.get(days)
+    if date is None:
+        date = (EPOCH + timedelta(days=days)).strftime("%Y-%m-%d")
+        timestampDates[days] = date
+
+    seconds, fraction = divmod(timeOfDay, 1000000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%s-%02d.%02d.%02d.%06d' % (date, hours, minutes, seconds, fraction)
+
+def recordTimestamp(record):
+    """
+      Gets the timestamp of a log entry in microseconds since the epoch, using the timestamp decoded at parse time if
+        the entry has one
+    """
+
+    timestamp = record.get(TIMESTAMP_KEY)
+    if timestamp is None:
+        timestamp = eventTimestamp(record['EVENT_TIME'])
+    return timestamp
+
+def iterDecodeTimestamps(log):
+    """
+      Decodes the EVENT_TIME of each log entry once, adding it to the entry as <code>TIMESTAMP_KEY</code>, and drops the
+        entries whose EVENT_TIME is not a valid timestamp
+    """
+
+    for entry in log:
+        try:
+            entry[TIMESTAMP_KEY] = eventTimestamp(entry['EVENT_TIME'])
+        except ValueError:
+            continue
+        yield entry
+
+class TimeRange(object):
+    """
+      Predicate accepting the EVENT_TIME strings within a time range, for use as a parser predicate. Timestamps with
+        the fixed <code>TIMESTAMP_FORMAT</code> layout sort in time order as strings, so they are compared as they
+        are, without being decoded.
+    """
+
+    def __init__(self, start=None, end=None):
+        """
+          @param  start   The start of the range (inclusive) as a datetime, EVENT_TIME string or microseconds since the
+                          epoch, or None if unbounded
+          @param  end     The end of the range (exclusive), or None if unbounded
+        """
+
+        self.start = self.eventTime(start)
+        self.end = self.eventTime(end)
+
+    @staticmethod
+    def eventTime(time):
+        if isinstance(time, datetime):
+            return time.strftime(TIMESTAMP_FORMAT)
+        elif isinstance(time, (int, long)):
+            return eventTime(time)
+        return time
+
+    def __call__(self, eventTime):
+        return (self.start is None or eventTime >= self.start) and (self.end is None or eventTime < self.end)
+
+    def __repr__(self):
+        return 'TimeRange(%r, %r)' % (self.start, self.end)
+
+class AllOf(object):
+    """
+      Predicate accepting the values accepted by every one of the given predicates, each of which is either a
+        collection of the values to keep or a function of the value. Unlike a lambda, it can be sent to the processes
+        of a parallel parse.
+    """
+
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def __call__(self, value):
+        for predicate in self.predicates:
+            if not (predicate(value) if callable(predicate) else value in predicate):
+                return False
+        return True
+
+    def __repr__(self):
+        return 'AllOf%r' % (self.predicates,)
+
+def materializePredicates(predicates):
+    """
+      Reads each collection of values to keep into a frozenset, so that a predicate given as a one-shot iterable can
+        be checked more than once
+
+        @param  predicates  Dictionary of field name -> predicate, or None
+        @return A dictionary of field name -> function or frozenset of the values to keep
+    """
+
+    return dict((name, predicate if callable(predicate) else frozenset(predicate))
+                for name, predicate in (predicates or {}).iteritems())
+
+def buildPredicates(predicates):
+    """
+      Normalizes the field predicates given to a parser, each of which is either a collection of the values to keep
+        or a function of the raw string value returning whether to keep it
+
+        @param  predicates  Dictionary of field name -> predicate, or None
+        @return A list of (field name, function) pairs
+    """
+
+    checks = []
+    for name, predicate in sorted((predicates or {}).iteritems()):
+        if not callable(predicate):
+            predicate = frozenset(predicate).__contains__
+        checks.append((name, predicate))
+    return checks
+
+def withTimeRange(predicates, start=None, end=None):
+    """
+      Adds a <code>TimeRange</code> predicate on EVENT_TIME to the given field predicates, unless both ends of the
+        range are None
+    """
+
+    if start is None and end is None:
+        return predicates
+
+    predicates = dict(predicates or {})
+    timeRange = TimeRange(start, end)
+    if 'EVENT_TIME' in predicates:
+        timeRange = AllOf(predicates['EVENT_TIME'], timeRange)
+    predicates['EVENT_TIME'] = timeRange
+    return predicates
+
+def predicateSpec(predicates):
+    """
+      Describes the field predicates given to a parser, for use in the field specification of a cached log. Only
+        collections of values, <code>TimeRange</code> and <code>AllOf</code> have the same description in every run.
+        Other functions, such as lambdas, are described by their memory address, so they cannot be cached.
+
+        @raise  ValueError  If a predicate is a function that cannot be cached
+    """
+
+    return [(name, cachedPredicateSpec(predicate)) for name, predicate in sorted((predicates or {}).iteritems())]
+
+def cachedPredicateSpec(predicate):
+    """
+      Describes a single field predicate, see predicateSpec
+    """
+
+    if isinstance(predicate, TimeRange):
+        return predicate
+    if isinstance(predicate, AllOf):
+        return ('AllOf', [cachedPredicateSpec(part) for part in predicate.predicates])
+    if callable(predicate):
+        raise ValueError('Cannot cache a log parsed with the predicate %r, use a collection of values, TimeRange or '
+                         'AllOf instead' % (predicate,))
+    return sorted(predicate)
+
 def summary(log):
     """
         Aggregates all unique values for every key, and returns a list
@@ -33,4 +269,135 @@ def summary(log):
     for key in logSummary.keys():
         logSummary[key] = list(logSummary[key])
 
-    return logSummary
\ No newline at end of file
+    return logSummary
+
+class StreamingSummary(object):
+    """
+      One-pass summary of the values of every field of a log, holding bounded memory however many distinct values a
+        field has. Each field is counted exactly until it has more than <code>exactLimit</code> distinct values, after
+        which it switches to sketches: an approximate distinct count (<code>HyperLogLog</code>) and the approximate
+        most frequent values (<code>SpaceSaving</code>). Low-cardinality fields such as SEVERITY stay exact, while
+        RECID, EVENT_TIME and MESSAGE are sketched.
+
+      Summaries of parts of a log, such as the chunks of a parallel parse, can be merged into the summary of the whole.
+    """
+
+    def __init__(self, exactLimit=1000, capacity=100, precision=14):
+        """
+          @param  exactLimit  The number of distinct values up to which a field is counted exactly
+          @param  capacity    The number of frequent values monitored for each sketched field
+          @param  precision   The precision of the distinct counts of sketched fields, see HyperLogLog
+        """
+
+        self.exactLimit = exactLimit
+        self.capacity = capacity
+        self.precision = precision
+        self.size = 0
+
+        # Field name -> dictionary of value -> count, for the fields counted exactly
+        self.exact = {}
+
+        # Field name -> (HyperLogLog, SpaceSaving), for the sketched fields
+        self.sketches = {}
+
+    def add(self, entry):
+        self.size += 1
+        for key, value in entry.iteritems():
+            counts = self.exact.get(key)
+            if counts is not None:
+                counts[value] = counts.get(value, 0) + 1
+                if len(counts) > self.exactLimit:
+                    self.sketch(key)
+            elif key in self.sketches:
+                distinct, frequent = self.sketches[key]
+                distinct.add(value)
+                frequent.add(value)
+            else:
+                self.exact[key] = {value: 1}
+
+    def update(self, log):
+        for entry in log:
+            self.add(entry)
+        return self
+
+    def sketch(self, key):
+        """
+          Switches a field from exact counts to sketches
+        """
+
+        distinct = HyperLogLog(self.precision)
+        frequent = SpaceSaving(self.capacity)
+        for value, count in self.exact.pop(key, {}).iteritems():
+            distinct.add(value)
+            frequent.add(value, count)
+        self.sketches[key] = (distinct, frequent)
+
+    def merge(self, other):
+        """
+          Merges the summary of another part of the log into this one
+        """
+
+        self.size += other.size
+        for key in other.sketches:
+            if key not in self.sketches:
+                self.sketch(key)
+        for key, counts in other.exact.iteritems():
+            if key in self.sketches:
+                distinct, frequent = self.sketches[key]
+                for value, count in counts.iteritems():
+                    distinct.add(value)
+                    frequent.add(value, count)
+            else:
+                ownCounts = self.exact.setdefault(key, {})
+                for value, count in counts.iteritems():
+                    ownCounts[value] = ownCounts.get(value, 0) + count
+                if len(ownCounts) > self.exactLimit:
+                    self.sketch(key)
+        for key, (distinct, frequent) in other.sketches.iteritems():
+            self.sketches[key][0].merge(distinct)
+            self.sketches[key][1].merge(frequent)
+        return self
+
+    def keys(self):
+        return list(self.exact) + list(self.sketches)
+
+    def isExact(self, key):
+        return key in self.exact
+
+    def distinctCount(self, key):
+        """
+          The number of distinct values of a field, which is approximate if the field is sketched
+        """
+
+        if key in self.exact:
+            return len(self.exact[key])
+        return self.sketches[key][0].count()
+
+    def topValues(self, key, k=10):
+        """
+          The most frequent values of a field
+
+            @return A list of (value, count, error) tuples, by decreasing count. The counts of sketched fields may be
+                    overestimated by up to their error, which is always 0 for exact fields.
+        """
+
+        if key in self.exact:
+            counts = sorted(self.exact[key].iteritems(), key=lambda item: item[1], reverse=True)
+            return [(value, count, 0) for value, count in counts[:k]]
+        return self.sketches[key][1].top(k)
+
+    def values(self, key):
+        """
+          The distinct values of a field that is counted exactly, as returned by <code>summary</code>
+        """
+
+        return list(self.exact[key])
+
+def streamingSummary(log, exactLimit=1000, capacity=100, precision=14):
+    """
+      Summarizes the values of every field of a log in a single pass, without holding the set of values of
+        high-cardinality fields. Unlike <code>summary</code>, the log can be any iterable, such as a parser generator.
+        See <code>StreamingSummary</code> for more information.
+    """
+
+    return StreamingSummary(exactLimit, capacity, precision).update(log)
@@ -1,22 +1,269 @@
+from multiprocessing import Pool, cpu_count
 import re
+from src.parser import ParserUtil, LogReader, LogFollower, TimeIndex
+from src.parser.ParserError import ParserError
+from src.parser.EventTable import EventTable
+from src.parser.LogRecord import LogRecord, RecordLayout
 
 __author__ = 'Roman'
 
-def parse(logFilePath, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False):
+# Returned by a matcher for lines rejected by a predicate, as opposed to None for lines that do not match at all
+REJECTED = False
+
+def parse(logFilePath, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False, columnar=False,
+          processes=None, predicates=None, fields=None, start=None, end=None, compact=False):
     """
         Parses the given log file. Please see parseInput for more information
+
+        @param columnar returns the log as a columnar <code>EventTable</code> instead of a list of dictionaries
+        @param processes parses the file in parallel with this many processes, see iterParallelParse
+        @param start keeps only the entries whose EVENT_TIME is at or after this time, given as a datetime or
+        EVENT_TIME string
+        @param end keeps only the entries whose EVENT_TIME is before this time. Given a time range, only the part of
+        the log that may hold it is read, using the sidecar index of the log, see TimeIndex.seek
+    """
+
+    log = iterParse(logFilePath, logKeys, delim, skipFirstLines, warnings, lineWarnings, processes, predicates, fields,
+                    start, end, compact)
+    return EventTable.fromRecords(log) if columnar else list(log)
+
+def iterParse(logFilePath, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False, processes=None,
+              predicates=None, fields=None, start=None, end=None, compact=False):
+    """
+        Lazily parses the given log file, yielding one log entry at a time. The file may be compressed, see
+        LogReader.readLines. Please see parse and parseInput for more information
     """
+    if processes is not None and processes > 1:
+        return iterParallelParse(logFilePath, logKeys, delim, skipFirstLines, warnings, lineWarnings, processes,
+                                 predicates=predicates, fields=fields, start=start, end=end, compact=compact)
+
+    startOffset, lineNumber, endOffset = TimeIndex.seek(logFilePath, start, end)
+
     def input():
         """
             Strip lines before passing them to parseInput
         """
-        with open(logFilePath, "rb") as logFile:
-            for line in logFile:
-                yield line.strip()
+        for line in LogReader.readLines(logFilePath, startOffset, endOffset):
+            yield line.strip()
+
+    return iterParseInput(input(), logKeys, delim, max(skipFirstLines - lineNumber, 0), warnings, lineWarnings,
+                          ParserUtil.withTimeRange(predicates, start, end), fields, compact)
+
+def follow(logFilePath, checkpointPath, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False,
+           predicates=None, fields=None):
+    """
+        Parses only the lines appended to a growing log file since the last call, see LogFollower.readNewLines.
+        Please see parseInput for more information
+
+        @param checkpointPath the file holding the offset read so far, which is updated by every call
+        @return a list of dictionaries of the new log data
+    """
+
+    lines = (line.strip() for line in LogFollower.readNewLines(logFilePath, checkpointPath, skipFirstLines))
+    return list(iterParseInput(lines, logKeys, delim, 0, warnings, lineWarnings, predicates, fields))
+
+def iterParallelParse(logFilePath, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False,
+                      processes=None, stripLines=True, predicates=None, fields=None, start=None, end=None,
+                      compact=False):
+    """
+        Parses the given log file with a pool of processes. The file is split into byte ranges aligned to line
+        boundaries, each range is parsed in a separate process, and the log entries are yielded in their original
+        line order. Warnings are reported with the same line numbers as a sequential parse.
+
+        @param processes the number of processes to use, defaulting to the number of cores
+        @param stripLines strips every line before matching it, as parse does
+        @param start only parses the part of the log that may hold entries within [start, end), see parse
+    """
+
+    predicates = ParserUtil.withTimeRange(predicates, start, end)
+
+    if LogReader.isCompressed(logFilePath):
+        #byte ranges of a compressed file cannot be decompressed independently, so parse it sequentially
+        lines = LogReader.readLines(logFilePath)
+        if stripLines:
+            lines = (line.strip() for line in lines)
+        for entry in iterParseInput(lines, logKeys, delim, skipFirstLines, warnings, lineWarnings, predicates,
+                                    fields, compact):
+            yield entry
+        return
+
+    # Find where the first line to parse begins, seeking to the time range and counting the skipped lines sequentially
+    startOffset, lineNumber, endOffset = TimeIndex.seek(logFilePath, start, end)
+    with open(logFilePath, "rb") as logFile:
+        logFile.seek(startOffset)
+        while lineNumber < skipFirstLines and logFile.readline():
+            lineNumber += 1
+        startOffset = logFile.tell()
 
-    return parseInput(input(), logKeys, delim, skipFirstLines, warnings, lineWarnings)
+    processes = processes or cpu_count()
+    pool = Pool(processes)
+    try:
+        #use several chunks per process, so that uneven chunks still keep every process busy
+        chunks = ParserUtil.splitFile(logFilePath, 4 * processes, startOffset, endOffset)
+        tasks = [(logFilePath, chunkStart, chunkEnd, logKeys, delim, stripLines, warnings, predicates, fields,
+                  compact)
+                 for chunkStart, chunkEnd in chunks]
 
-def parseInput(logFile, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False):
+        skippedLines = 0
+        for log, numberOfLines, skipped in pool.imap(parseChunk, tasks):
+            for entry in log:
+                yield entry
+
+            #report lines that did not match, offset by the lines in the previous chunks
+            skippedLines += len(skipped)
+            if lineWarnings:
+                for chunkLineNumber, line in skipped:
+                    print "Warning: line", lineNumber + chunkLineNumber, "skipped:"
+                    print line
+            lineNumber += numberOfLines
+
+        if warnings and skippedLines > 0:
+            print "Warning:", skippedLines, "lines skipped"
+    finally:
+        pool.terminate()
+
+def parseChunk(task):
+    """
+        Parses the lines in one byte range of a log file, as a task of iterParallelParse
+
+        @return a tuple of the log entries, the number of lines read, and (line number, line) pairs for
+        the lines that were skipped, numbered from the start of the range
+    """
+
+    logFilePath, start, end, logKeys, delim, stripLines, warnings, predicates, fields, compact = task
+    match = buildMatcher(logKeys, delim, predicates, fields, compact)
+
+    log = []
+    skipped = []
+    lineNumber = 0
+    with open(logFilePath, "rb") as logFile:
+        logFile.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            line = logFile.readline()
+            if not line:
+                break
+            remaining -= len(line)
+            lineNumber += 1
+
+            if stripLines:
+                line = line.strip()
+            entry = match(line)
+            if entry is not None and entry is not REJECTED:
+                log.append(entry)
+            elif entry is None and warnings and len(line.strip()) > 1:
+                skipped.append((lineNumber, line.strip()))
+
+    return log, lineNumber, skipped
+
+def buildMatcher(logKeys, delim="\s+", predicates=None, fields=None, compact=False):
+    """
+        Builds the function used to match each line, which returns the log entry for a line, None if the
+        line does not match, or REJECTED if a predicate rejects it.
+
+        The predicates are checked against the matched groups before the log entry is built. A line is first
+        screened for the values of each set of values to keep, so that most rejected lines are not matched at all.
+
+        @param predicates dictionary of field name -> collection of the values to keep, or function of the raw
+        value returning whether to keep it (such as ParserUtil.TimeRange)
+        @param fields the names of the fields to keep in each log entry, or None to keep every field. The other
+        fields are matched without being captured.
+        @param compact builds each log entry as a LogRecord holding the line and the span of each field, which
+        decodes the fields as they are accessed.
+    """
+
+    predicates = ParserUtil.materializePredicates(predicates)
+    checks = ParserUtil.buildPredicates(predicates)
+
+    names = [name for name, elem_regex in logKeys]
+    for name, check in checks:
+        if name not in names:
+            raise ParserError("Cannot filter on '%s': the log has no such field" % name)
+    for name in fields or []:
+        if name not in names:
+            raise ParserError("Cannot project '%s': the log has no such field" % name)
+
+    #capture the projected fields, along with the fields the predicates need
+    captured = None
+    if fields is not None:
+        captured = set(fields) | set(name for name, check in checks)
+    regex = buildRegex(logKeys, delim, captured)
+
+    if compact:
+        recordNames = fields if fields is not None else names
+        layout = RecordLayout(recordNames, groups=[regex.groupindex[name] for name in recordNames])
+
+        def entry(m):
+            return LogRecord.fromMatch(m, layout)
+    elif captured is not None and len(captured) > len(set(fields)):
+        def entry(m):
+            return dict((name, m.group(name)) for name in fields)
+    else:
+        def entry(m):
+            return m.groupdict()
+
+    #a line can only hold one of the values to keep if it contains it
+    screens = [screenValues(predicate) for name, predicate in sorted(predicates.iteritems())
+               if not callable(predicate) and '' not in predicate]
+
+    if not checks:
+        def match(line):
+            m = regex.match(line)
+            return entry(m) if m is not None else None
+
+        return match
+
+    def match(line):
+        for values in screens:
+            for value in values:
+                if value in line:
+                    break
+            else:
+                return REJECTED
+
+        m = regex.match(line)
+        if m is None:
+            return None
+        for name, check in checks:
+            if not check(m.group(name)):
+                return REJECTED
+        return entry(m)
+
+    return match
+
+def screenValues(values):
+    """
+        Gets the substrings a line has to contain one of to hold one of the given values to keep. Values that are not
+        strings are left out, as a matched field is always a string and never equals them.
+    """
+
+    return tuple(value.encode('utf-8') if isinstance(value, unicode) else value
+                 for value in values if isinstance(value, basestring))
+
+def buildRegex(logKeys, delim="\s+", captured=None):
+    """
+        Builds the compiled regular expression matching one full line of the log, with one named group per key
+
+        @param captured the names of the keys to capture, or None to capture every key. The other keys are
+        matched with non-capturing groups.
+    """
+
+    #create regular expression
+    regex_string = "^"
+    for name, elem_regex in logKeys:
+        if regex_string != "^":
+            regex_string += delim
+        if captured is None or name in captured:
+            regex_string += "(?P<" + name + ">" + elem_regex + ")"
+        else:
+            regex_string += "(?:" + elem_regex + ")"
+
+    #compile regex
+    regex_string += "$"
+    return re.compile(regex_string)
+
+def parseInput(logFile, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False, predicates=None,
+               fields=None, compact=False):
     """
       Parses the log data, using regular expressions (regex) to pull out information
 
@@ -28,22 +275,29 @@ def parseInput(logFile, logKeys, delim="\s+", skipFirstLines=0, warnings=False,
       @param warnings prints warnings for skipped lines that the regular expressions could not match
       @param lineWarnings prints warnings for every line for which the regular expression did not match.
       If there are many of these, you may want to fine-tune your regular expression better.
+      @param predicates keeps only the lines whose fields pass these predicates, see buildMatcher. Lines rejected
+      by a predicate are not reported as skipped.
+      @param fields keeps only these fields in each log entry, see buildMatcher
+      @param compact returns each log entry as a LogRecord, which takes several times less memory than a dictionary
+      and can be accessed in the same way, see buildMatcher
 
       @return a list of dictionaries of the log data
     """
 
-    #create regular expression
-    regex_string = "^"
-    for name, elem_regex in logKeys:
-        if regex_string != "^":
-            regex_string += delim
-        regex_string += "(?P<" + name + ">" + elem_regex + ")"
+    return list(iterParseInput(logFile, logKeys, delim, skipFirstLines, warnings, lineWarnings, predicates, fields,
+                               compact))
 
-    #compile regex
-    regex_string += "$"
-    regex = re.compile(regex_string)
+def iterParseInput(logFile, logKeys, delim="\s+", skipFirstLines=0, warnings=False, lineWarnings=False,
+                   predicates=None, fields=None, compact=False):
+    """
+      Generator version of parseInput, yielding each log entry as soon as its line is matched, so that
+      only the current line is held in memory. The summary warning is printed once the input is exhausted.
+
+      @return a generator of dictionaries of the log data
+    """
+
+    match = buildMatcher(logKeys, delim, predicates, fields, compact)
 
-    log = []
     lineNumber = 0
     skippedLines = 0
 
@@ -56,13 +310,13 @@ def parseInput(logFile, logKeys, delim="\s+", skipFirstLines=0, warnings=False,
             continue
 
         #read log data
-        m = regex.match(line)
+        entry = match(line)
 
-        if m is not None:
-            #found a match, add to logs
-            log.append(m.groupdict())
+        if entry is not None and entry is not REJECTED:
+            #found a match, emit it
+            yield entry
 
-        elif warnings and len(line.strip()) > 1:
+        elif entry is None and warnings and len(line.strip()) > 1:
             #regex did not match this line
             skippedLines += 1
             if lineWarnings:
@@ -71,5 +325,3 @@ def parseInput(logFile, logKeys, delim="\s+", skipFirstLines=0, warnings=False,
 
     if warnings and skippedLines > 0:
         print "Warning:", skippedLines, "lines skipped"
-
-    return log
\ No newline at end of file
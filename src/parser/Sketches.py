@@ -0,0 +1,210 @@
+import heapq
+import math
+import numpy
+
+__author__ = 'Roman'
+
+# Mask keeping the low 64 bits of an integer
+MASK64 = (1 << 64) - 1
+
+# The Mersenne prime 2^31 - 1, the modulus of the MinHash hash functions
+MERSENNE31 = (1 << 31) - 1
+
+
+def hash64(value):
+    """
+      Hashes a value to 64 well mixed bits, by passing its Python hash through the splitmix64 finalizer. Python's
+        string hashes are deterministic unless hash randomization is enabled (python -R), so sketches built by
+        different processes of the same interpreter can be merged.
+    """
+
+    x = hash(value) & MASK64
+    x ^= x >> 30
+    x = (x * 0xbf58476d1ce4e5b9) & MASK64
+    x ^= x >> 27
+    x = (x * 0x94d049bb133111eb) & MASK64
+    return x ^ (x >> 31)
+
+
+class HyperLogLog(object):
+    """
+      Approximate count of the distinct values in a stream, using 2^precision one byte registers. The relative error
+        of the count is about 1.04 / sqrt(2^precision), so 0.8% with the default precision of 14 (16KB). Sketches of
+        the same precision can be merged, giving the sketch of the union of their streams.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        x = hash64(value)
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+          Merges another sketch of the same precision into this one
+        """
+
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precisions')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        """
+          Estimates the number of distinct values added to the sketch
+        """
+
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+
+        # Small cardinalities are estimated more accurately from the number of empty registers
+        zeros = self.registers.count('\0')
+        if estimate <= 2.5 * size and zeros > 0:
+            estimate = size * math.log(float(size) / zeros)
+        return int(round(estimate))
+
+
+class SpaceSaving(object):
+    """
+      The approximate most frequent values of a stream (heavy hitters), monitoring at most <code>capacity</code>
+        values. A value that is not monitored replaces the value with the smallest count, inheriting that count as its
+        error, so every count is an overestimate by at most its error. Every value occurring more than
+        (number of values / capacity) times is guaranteed to be monitored. Sketches can be merged, giving the sketch of
+        the union of their streams.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+        # Min-heap of (count, value), holding each monitored value once. The counts of the heap are only updated
+        #   lazily, when a value with an outdated count reaches the top of the heap.
+        self.heap = []
+
+    def add(self, value, count=1):
+        counts = self.counts
+        if value in counts:
+            counts[value] += count
+            return
+
+        if len(counts) < self.capacity:
+            counts[value] = count
+            self.errors[value] = 0
+            heapq.heappush(self.heap, (count, value))
+            return
+
+        # Find the value with the smallest count, updating outdated counts on the way
+        heap = self.heap
+        while True:
+            minimum, candidate = heap[0]
+            if counts[candidate] == minimum:
+                break
+            heapq.heapreplace(heap, (counts[candidate], candidate))
+
+        heapq.heapreplace(heap, (minimum + count, value))
+        del counts[candidate]
+        del self.errors[candidate]
+        counts[value] = minimum + count
+        self.errors[value] = minimum
+
+    def minimum(self):
+        """
+          The count that any value that is not monitored may have occurred up to
+        """
+
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.itervalues())
+
+    def merge(self, other):
+        """
+          Merges another sketch into this one. A value monitored by only one of the sketches may have occurred up to the
+            smallest count of the other, which is added to both its count and its error.
+        """
+
+        selfMinimum = self.minimum()
+        otherMinimum = other.minimum()
+
+        counts = {}
+        errors = {}
+        for value in set(self.counts) | set(other.counts):
+            counts[value] = self.counts.get(value, selfMinimum) + other.counts.get(value, otherMinimum)
+            errors[value] = self.errors.get(value, selfMinimum) + other.errors.get(value, otherMinimum)
+
+        kept = heapq.nlargest(self.capacity, counts.iteritems(), key=lambda item: item[1])
+        self.counts = dict(kept)
+        self.errors = dict((value, errors[value]) for value, count in kept)
+        self.heap = [(count, value) for value, count in kept]
+        heapq.heapify(self.heap)
+
+    def top(self, k=None):
+        """
+          The monitored values with the largest counts
+
+            @param  k   The number of values to return, or None to return every monitored value
+            @return A list of (value, count, error) tuples, by decreasing count
+        """
+
+        items = sorted(self.counts.iteritems(), key=lambda item: item[1], reverse=True)
+        if k is not None:
+            items = items[:k]
+        return [(value, count, self.errors[value]) for value, count in items]
+
+
+class MinHash(object):
+    """
+      MinHash signatures of sets of integers, such as the token ids of messages, see Vocabulary.tokenize. Each of the
+        <code>size</code> hash functions keeps the smallest hash of the set, so the fraction of equal values of two
+        signatures estimates the Jaccard similarity of their sets (Broder, "On the resemblance and containment of
+        documents", 1997). Signatures of the same size and seed can be compared across processes.
+    """
+
+    def __init__(self, size=64, seed=0):
+        """
+          @param  size    The number of hash functions, and the length of each signature
+          @param  seed    The seed of the random hash functions
+        """
+
+        self.size = size
+        self.seed = seed
+        randomState = numpy.random.RandomState(seed)
+        self.a = randomState.randint(1, MERSENNE31, size=size).astype(numpy.int64)
+        self.b = randomState.randint(0, MERSENNE31, size=size).astype(numpy.int64)
+
+    def signature(self, values):
+        """
+          The signature of a set of non-negative integers smaller than 2^31, as an array of <code>size</code> integers.
+            Every empty set has the same signature.
+        """
+
+        values = numpy.asarray(values, dtype=numpy.int64)
+        if len(values) == 0:
+            return numpy.full(self.size, MERSENNE31, dtype=numpy.int64)
+        return ((self.a[:, None] * values[None, :] + self.b[:, None]) % MERSENNE31).min(axis=1)
+
+    def bands(self, signature, bands):
+        """
+          Splits a signature into bands for locality-sensitive hashing. Two sets have some band in common with a
+            probability of 1 - (1 - s^r)^bands, where s is their Jaccard similarity and r = size / bands is the number
+            of values per band, so only similar sets are likely to share one.
+
+            @return A list of one hashable key per band, which tells apart equal bands of different positions
+        """
+
+        rows = self.size // bands
+        return [(band, signature[band * rows:(band + 1) * rows].tostring()) for band in xrange(bands)]
+
+    @staticmethod
+    def similarity(signature1, signature2):
+        """
+          Estimates the Jaccard similarity of the sets of two signatures
+        """
+
+        return float(numpy.count_nonzero(signature1 == signature2)) / len(signature1)
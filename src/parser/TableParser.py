@@ -1,14 +1,50 @@
+from src.parser import LogReader, LogFollower, ParserUtil, TimeIndex
+from src.parser.EventTable import EventTable
+from src.parser.LogRecord import LogRecord, RecordLayout
+
 __author__ = 'Roman'
 
-def parse(logFilePath, logKeys, skipFirstLines=0):
+def parse(logFilePath, logKeys, skipFirstLines=0, columnar=False, predicates=None, fields=None, start=None, end=None,
+          compact=False):
     """
         Parses the given log file. See parseInput for more information
+
+        @param columnar returns the log as a columnar <code>EventTable</code> instead of a list of dictionaries
+        @param start keeps only the entries whose EVENT_TIME is within [start, end), reading only the part of the log
+        that may hold them, see RegexParser.parse
     """
-    with open(logFilePath, "rb") as logFile:
-        return parseInput(logFile, logKeys, skipFirstLines)
+
+    log = iterParse(logFilePath, logKeys, skipFirstLines, predicates, fields, start, end, compact)
+    return EventTable.fromRecords(log) if columnar else list(log)
 
 
-def parseInput(input, logKeys, skipFirstLines=0):
+def iterParse(logFilePath, logKeys, skipFirstLines=0, predicates=None, fields=None, start=None, end=None,
+              compact=False):
+    """
+        Lazily parses the given log file, yielding one log entry at a time. The file may be compressed, see
+        LogReader.readLines. See parse and parseInput for more information
+    """
+
+    startOffset, lineNumber, endOffset = TimeIndex.seek(logFilePath, start, end)
+    return iterParseInput(LogReader.readLines(logFilePath, startOffset, endOffset), logKeys,
+                          max(skipFirstLines - lineNumber, 0), ParserUtil.withTimeRange(predicates, start, end), fields,
+                          compact)
+
+
+def follow(logFilePath, checkpointPath, logKeys, skipFirstLines=0, predicates=None, fields=None):
+    """
+        Parses only the lines appended to a growing log file since the last call, see LogFollower.readNewLines.
+        See parseInput for more information
+
+        @param checkpointPath the file holding the offset read so far, which is updated by every call
+        @return a list of dictionaries of the new log data
+    """
+
+    return list(iterParseInput(LogFollower.readNewLines(logFilePath, checkpointPath, skipFirstLines), logKeys,
+                               predicates=predicates, fields=fields))
+
+
+def parseInput(input, logKeys, skipFirstLines=0, predicates=None, fields=None, compact=False):
     """
       Parses the log data, expecting that every field starts at the same index on every
       line. This is good for log files organized as a table, where the spacing between
@@ -18,10 +54,30 @@ def parseInput(input, logKeys, skipFirstLines=0):
       of the field, and the second entry denotes which index in every line thefield begins at.
       Note that we use 0-based indices.
       @param skipFirstLines skips the first x number of lines from this log file
+      @param predicates keeps only the lines whose fields pass these predicates, see acceptsLine
+      @param fields keeps only these fields in each log entry, without slicing the other columns, or None to keep
+      every field
+      @param compact returns each log entry as a LogRecord holding its line, which slices the fields as they are
+      accessed, and takes several times less memory than a dictionary that can be accessed in the same way
 
       @return a list of dictionaries of the log data
     """
-    log = []
+
+    return list(iterParseInput(input, logKeys, skipFirstLines, predicates, fields, compact))
+
+
+def iterParseInput(input, logKeys, skipFirstLines=0, predicates=None, fields=None, compact=False):
+    """
+      Generator version of parseInput, yielding each log entry as soon as its line is read, so that
+      only the current line is held in memory.
+
+      @return a generator of dictionaries of the log data
+    """
+
+    checks = ParserUtil.buildPredicates(predicates)
+    if fields is not None:
+        fields = set(fields)
+    layout = recordLayout(logKeys, fields) if compact else None
     lineNumber = 0
 
     for line in input:
@@ -31,22 +87,128 @@ def parseInput(input, logKeys, skipFirstLines=0):
         if lineNumber <= skipFirstLines:
             continue
 
-        logEntry = {}
+        if checks and not acceptsLine(line, logKeys, checks):
+            continue
 
-        for i in range(len(logKeys)):
-            name, startIndex = logKeys[i]
+        if layout is not None:
+            logEntry = parseRecord(line, logKeys, layout)
+        else:
+            logEntry = parseLine(line, logKeys, fields)
+        if logEntry is not None:
+            yield logEntry
 
-            if i == len(logKeys) - 1:
-                endIndex = len(line)
-            else:
-                endIndex = logKeys[i + 1][1]
 
-            #if this condition occurs, the line is probably an empty line
-            if endIndex > len(line):
-                break
+def parseLine(line, logKeys, fields=None):
+    """
+      Parses a single line of the table, see parseInput for the format of <code>logKeys</code>
+
+      @param fields the names of the fields to slice out of the line, or None to slice every field
+      @return the dictionary of the log data for this line, or None if the line is too short to hold every field
+    """
+
+    #if this condition occurs, the line is probably an empty line
+    if len(logKeys) > 1 and logKeys[-1][1] > len(line):
+        return None
+
+    logEntry = {}
+
+    for i in range(len(logKeys)):
+        name, startIndex = logKeys[i]
+        if fields is not None and name not in fields:
+            continue
+
+        if i == len(logKeys) - 1:
+            endIndex = len(line)
+        else:
+            endIndex = logKeys[i + 1][1]
+
+        logEntry[name] = line[startIndex:endIndex].strip()
 
-            logEntry[name] = line[startIndex:endIndex].strip()
+    return logEntry
+
+
+def recordLayout(logKeys, fields=None):
+    """
+      Builds the layout of the compact records of a table, holding the column of each field to slice out of the lines
+
+      @param fields the names of the fields of each record, or None for every field
+    """
+
+    names = []
+    columns = []
+    for i in range(len(logKeys)):
+        name, startIndex = logKeys[i]
+        if fields is None or name in fields:
+            names.append(name)
+            columns.append((startIndex, logKeys[i + 1][1] if i < len(logKeys) - 1 else None))
+    return RecordLayout(names, columns, strip=True)
+
+
+def parseRecord(line, logKeys, layout):
+    """
+      Compact version of parseLine, returning a LogRecord of the line with the given layout, see recordLayout
+
+      @return the record of the log data for this line, or None if the line is too short to hold every field
+    """
+
+    if len(logKeys) > 1 and logKeys[-1][1] > len(line):
+        return None
+    return LogRecord(line, layout)
+
+
+def acceptsLine(line, logKeys, checks):
+    """
+      Checks the predicates against the raw columns of a line, so that rejected lines are never fully parsed. Lines
+        whose layout has no column for a predicate are rejected.
+
+      @param checks a list of (field name, function of the raw value) pairs, see ParserUtil.buildPredicates
+    """
+
+    for name, check in checks:
+        for i in xrange(len(logKeys)):
+            if logKeys[i][0] == name:
+                break
         else:
-            log.append(logEntry)
+            return False
+
+        startIndex = logKeys[i][1]
+        endIndex = logKeys[i + 1][1] if i < len(logKeys) - 1 else len(line)
+        if not check(line[startIndex:endIndex].strip()):
+            return False
+    return True
+
+
+def isSeparatorLine(line):
+    """
+      Checks whether a line is the row of dashes separating a table header from its data, such as
+        <code>----------- ---------- ----------------</code>
+    """
+
+    line = line.rstrip()
+    return len(line) > 0 and line.strip("- ") == ""
+
+
+def columnIndices(separatorLine):
+    """
+      Finds the index at which each column begins, from the row of dashes underlining the table header
+    """
+
+    indices = []
+    for index in xrange(len(separatorLine)):
+        if separatorLine[index] == '-' and (index == 0 or separatorLine[index - 1] != '-'):
+            indices.append(index)
+    return indices
+
+
+def fitsLayout(line, logKeys):
+    """
+      Checks whether the columns described by <code>logKeys</code> line up with the given line, i.e. whether every
+        column that begins within the line is preceded by whitespace
+    """
 
-    return log
\ No newline at end of file
+    for name, startIndex in logKeys[1:]:
+        if startIndex > len(line):
+            break
+        if not line[startIndex - 1].isspace():
+            return False
+    return True
@@ -0,0 +1,143 @@
+__author__ = 'Roman'
+
+# The token standing for a variable part of a message in a template
+WILDCARD = '<*>'
+
+
+def hasDigits(token):
+    for character in token:
+        if character.isdigit():
+            return True
+    return False
+
+
+class Template(object):
+    """
+      A message template, with the tokens shared by all of its messages and wildcards for their variable parts
+    """
+
+    __slots__ = ('id', 'tokens', 'size')
+
+    def __init__(self, templateId, tokens):
+        self.id = templateId
+        self.tokens = list(tokens)
+        self.size = 0
+
+    def similarity(self, tokens):
+        """
+          The fraction of the tokens of a message equal to the tokens of the template, not counting wildcards
+        """
+
+        same = 0
+        for templateToken, token in zip(self.tokens, tokens):
+            if templateToken == token:
+                same += 1
+        return float(same) / len(tokens) if tokens else 1.0
+
+    def update(self, tokens):
+        """
+          Replaces the tokens of the template that differ from those of a new message with wildcards
+        """
+
+        for index, token in enumerate(tokens):
+            if self.tokens[index] != token:
+                self.tokens[index] = WILDCARD
+        self.size += 1
+
+    def __str__(self):
+        return ' '.join(self.tokens)
+
+
+class TemplateMiner(object):
+    """
+      Online log template miner, assigning an integer template id to each message in a single pass, in the style of
+        Drain (He et al., "Drain: An Online Log Parsing Approach with Fixed Depth Tree", ICWS 2017). Messages are
+        routed through a tree of fixed depth, first by their number of tokens, then by their first tokens, to a
+        short list of templates, and join the most similar one if it is similar enough. Otherwise they start a new
+        template. Tokens holding digits are treated as variables while routing, and each node has a bounded number
+        of children, so the memory used only grows with the number of templates.
+    """
+
+    def __init__(self, depth=4, similarity=0.5, maxChildren=100):
+        """
+          @param  depth       The depth of the tree, so that messages are routed by their first (depth - 2) tokens
+          @param  similarity  The fraction of tokens a message must share with a template to join it
+          @param  maxChildren The largest number of children of a node, including the wildcard child that the tokens
+                              beyond it are routed to
+        """
+
+        self.depth = depth
+        self.similarity = similarity
+        self.maxChildren = maxChildren
+        self.root = {}
+        self.templates = []
+
+    def leaf(self, tokens):
+        """
+          Finds the list of templates that messages with the given tokens are routed to, adding it if there is none
+        """
+
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.depth - 2]:
+            if hasDigits(token):
+                token = WILDCARD
+            if token not in node:
+                # The last child of a full node is kept for the wildcard
+                if len(node) >= self.maxChildren - 1:
+                    token = WILDCARD
+                node = node.setdefault(token, {})
+            else:
+                node = node[token]
+        return node.setdefault(None, [])
+
+    def add(self, message):
+        """
+          Assigns a message to a template, updating the template or adding a new one
+
+            @return A tuple of the id of the template, and the list of the tokens of the message at its wildcards
+        """
+
+        tokens = message.split()
+        templates = self.leaf(tokens)
+
+        best = None
+        bestSimilarity = -1.0
+        for template in templates:
+            similarity = template.similarity(tokens)
+            if similarity > bestSimilarity:
+                best, bestSimilarity = template, similarity
+
+        if best is None or bestSimilarity < self.similarity:
+            best = Template(len(self.templates), tokens)
+            self.templates.append(best)
+            templates.append(best)
+        best.update(tokens)
+
+        parameters = [token for templateToken, token in zip(best.tokens, tokens) if templateToken == WILDCARD]
+        return best.id, parameters
+
+    def template(self, templateId):
+        """
+          The text of a template, with <*> standing for each of its variable tokens
+        """
+
+        return str(self.templates[templateId])
+
+    def iterMine(self, log, key='MESSAGE', templateKey='TEMPLATE_ID', parametersKey=None):
+        """
+          Adds the template id of the message of each log entry as a new integer field, in a single streaming pass
+
+            @param  key             The field holding the message
+            @param  templateKey     The field to store the template id in
+            @param  parametersKey   The field to store the variable tokens of the message in, or None to drop them
+        """
+
+        for entry in log:
+            templateId, parameters = self.add(entry[key])
+            entry[templateKey] = templateId
+            if parametersKey is not None:
+                entry[parametersKey] = parameters
+            yield entry
+
+    def __repr__(self):
+        return 'TemplateMiner(%r, %r, %r)' % (self.depth, self.similarity, self.maxChildren)
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+from src.parser import ParserUtil, LogReader
+
+__author__ = 'Roman'
+
+# The version of the index layout, to rebuild old indices whenever it changes
+INDEX_VERSION = 1
+
+# The number of lines between two entries of the index
+INDEX_INTERVAL = 10000
+
+# Matches an EVENT_TIME anywhere in a raw log line, so that the index can be built without parsing the log
+EVENT_TIME_REGEX = re.compile("\d{4}-\d\d-\d\d-\d\d\.\d\d\.\d\d\.\d{6}")
+
+
+def indexPath(logFilePath):
+    """
+      The path of the sidecar file holding the index of a log file
+    """
+
+    return logFilePath + '.timeindex'
+
+
+def lineTimestamp(line):
+    """
+      Finds the first EVENT_TIME in a raw log line, in microseconds since the epoch, or None if the line has none
+    """
+
+    match = EVENT_TIME_REGEX.search(line)
+    if match is None:
+        return None
+    try:
+        return ParserUtil.eventTimestamp(match.group())
+    except ValueError:
+        return None
+
+
+def build(logFilePath, interval=INDEX_INTERVAL):
+    """
+      Builds the sparse time index of a log file in a single pass, without parsing it. The log is split into blocks of
+        <code>interval</code> lines, and for the start of each block the index holds:
+
+        - its byte offset and line number
+        - the latest timestamp of any line before it
+        - the earliest timestamp of any line at or after it
+
+      The timestamps bound every line on either side of a block boundary, so the index stays exact for logs that are
+        not entirely in time order, such as logs merged from several sources.
+    """
+
+    offsets = []
+    lineNumbers = []
+    latestBefore = []
+    earliestIn = []
+
+    latest = None
+    earliest = None
+    offset = 0
+    lineNumber = 0
+    with open(logFilePath, "rb") as logFile:
+        for line in logFile:
+            if lineNumber % interval == 0:
+                if offsets:
+                    earliestIn.append(earliest)
+                offsets.append(offset)
+                lineNumbers.append(lineNumber)
+                latestBefore.append(latest)
+                earliest = None
+
+            timestamp = lineTimestamp(line)
+            if timestamp is not None:
+                if latest is None or timestamp > latest:
+                    latest = timestamp
+                if earliest is None or timestamp < earliest:
+                    earliest = timestamp
+
+            offset += len(line)
+            lineNumber += 1
+
+    if offsets:
+        earliestIn.append(earliest)
+
+    # The earliest timestamp at or after each boundary is the minimum over the blocks after it
+    earliestAfter = [None] * len(offsets)
+    earliest = None
+    for block in reversed(xrange(len(offsets))):
+        if earliestIn[block] is not None and (earliest is None or earliestIn[block] < earliest):
+            earliest = earliestIn[block]
+        earliestAfter[block] = earliest
+
+    status = os.stat(logFilePath)
+    return {
+        'version': INDEX_VERSION,
+        'size': status.st_size,
+        'mtime': status.st_mtime,
+        'interval': interval,
+        'offsets': offsets,
+        'lineNumbers': lineNumbers,
+        'latestBefore': latestBefore,
+        'earliestAfter': earliestAfter
+    }
+
+
+def load(logFilePath, interval=None):
+    """
+      Loads the index of a log file from its sidecar file, building the index and saving it first if there is no
+        sidecar, or if the log has changed since it was built. The index is only kept in memory if the sidecar cannot
+        be written.
+
+        @param  interval    The number of lines between two entries of the index, INDEX_INTERVAL by default
+    """
+
+    interval = interval or INDEX_INTERVAL
+    status = os.stat(logFilePath)
+    path = indexPath(logFilePath)
+    if os.path.exists(path):
+        with open(path) as indexFile:
+            index = json.load(indexFile)
+        if (index['version'], index['size'], index['mtime'], index['interval']) == \
+                (INDEX_VERSION, status.st_size, status.st_mtime, interval):
+            return index
+
+    index = build(logFilePath, interval)
+    try:
+        temporaryPath = path + '.tmp'
+        with open(temporaryPath, 'w') as indexFile:
+            json.dump(index, indexFile)
+        os.rename(temporaryPath, path)
+    except (IOError, OSError):
+        pass
+    return index
+
+
+def byteRange(index, start=None, end=None):
+    """
+      Finds the part of a log holding every line with a timestamp within [start, end)
+
+        @param  start   The start of the time range (inclusive), in microseconds since the epoch, or None if unbounded
+        @param  end     The end of the time range (exclusive), in microseconds since the epoch, or None if unbounded
+        @return A tuple of the byte offset and line number the part begins at, and the byte offset it ends at, or None
+                if it ends at the end of the log
+    """
+
+    offsets = index['offsets']
+    first = 0
+    last = len(offsets)
+    if start is not None:
+        for block in xrange(len(offsets)):
+            latest = index['latestBefore'][block]
+            if latest is None or latest < start:
+                first = block
+    if end is not None:
+        for block in reversed(xrange(first + 1, len(offsets))):
+            earliest = index['earliestAfter'][block]
+            if earliest is None or earliest >= end:
+                last = block
+
+    if not offsets:
+        return 0, 0, None
+    return offsets[first], index['lineNumbers'][first], offsets[last] if last < len(offsets) else None
+
+
+def timestamp(time):
+    """
+      Converts a time given as a datetime, an EVENT_TIME string, or microseconds since the epoch, to microseconds since
+        the epoch
+    """
+
+    if time is None or isinstance(time, (int, long)):
+        return time
+    if isinstance(time, basestring):
+        return ParserUtil.eventTimestamp(time)
+    return ParserUtil.microseconds(time - ParserUtil.EPOCH)
+
+
+def seek(logFilePath, start=None, end=None):
+    """
+      Finds the part of a log file holding every line with a timestamp within [start, end), using its sidecar index,
+        so that the lines before the time range can be skipped by seeking, and the lines after it are not read at all.
+        Some lines outside of the time range may still be within the part, so the parsed events have to be filtered
+        by time as well.
+
+        @param  start   The start of the time range (inclusive) as a datetime or EVENT_TIME string, or None if unbounded
+        @param  end     The end of the time range (exclusive) as a datetime or EVENT_TIME string, or None if unbounded
+        @return A tuple of the byte offset and line number the part begins at, and the byte offset it ends at, or None
+                if it ends at the end of the log. The whole log is returned if there is no time range, or if the log is
+                compressed and cannot be read from an offset.
+    """
+
+    if (start is None and end is None) or LogReader.isCompressed(logFilePath):
+        return 0, 0, None
+    return byteRange(load(logFilePath), timestamp(start), timestamp(end))
+
@@ -0,0 +1,114 @@
+from array import array
+import json
+
+__author__ = 'Roman'
+
+# The delimiter between the words of a MESSAGE
+DELIMITER = " "
+
+
+class Vocabulary(object):
+    """
+      Maps the words of MESSAGE text to integer token ids, so that each message is split and hashed once, into a
+        sorted array of the ids of its distinct words, which the filter and correlation code compare without touching
+        the text again. Words that are not in the vocabulary are dropped, unless the vocabulary is allowed to grow.
+    """
+
+    def __init__(self, words=()):
+        """
+          @param  words   The words of the vocabulary, which are given ids in this order
+        """
+
+        self.ids = {}
+        self.words = []
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def fromLog(cls, log, key='MESSAGE'):
+        """
+          Builds the vocabulary of every word of the messages of a log, in the order they first occur
+        """
+
+        vocabulary = cls()
+        for entry in log:
+            vocabulary.tokenize(entry[key], grow=True)
+        return vocabulary
+
+    @classmethod
+    def load(cls, path):
+        """
+          Loads a vocabulary saved by <code>save</code>, keeping the ids of its words
+        """
+
+        with open(path) as vocabularyFile:
+            # JSON strings are loaded as unicode, but parsed messages are byte strings, which are saved as latin-1 so
+            #   that every byte string, whatever its encoding, round-trips unchanged
+            return cls(word.encode('latin-1') for word in json.load(vocabularyFile))
+
+    def save(self, path):
+        with open(path, 'w') as vocabularyFile:
+            json.dump([word.decode('latin-1') for word in self.words], vocabularyFile)
+
+    def add(self, word):
+        """
+          Adds a word to the vocabulary if it is not in it yet
+
+            @return The id of the word
+        """
+
+        tokenId = self.ids.get(word)
+        if tokenId is None:
+            tokenId = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return tokenId
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def tokenize(self, message, grow=False):
+        """
+          Converts a message to the sorted array of the ids of its distinct words
+
+            @param  grow    Adds the words that are not in the vocabulary yet, instead of dropping them
+        """
+
+        if grow:
+            tokens = set(self.add(word) for word in message.split(DELIMITER))
+        else:
+            ids = self.ids
+            tokens = set(ids[word] for word in message.split(DELIMITER) if word in ids)
+        return array('i', sorted(tokens))
+
+    def tokenizeLog(self, log, key='MESSAGE', tokensKey='TOKENS'):
+        """
+          Tokenizes the message of every event of a log, reusing the tokens of an event that already has them. Logs
+            hold many copies of the same messages, so each distinct message is only tokenized once, and its events share
+            the same array.
+
+            @return The list of the token arrays of the events, in order
+        """
+
+        tokenized = {}
+        tokens = []
+        for entry in log:
+            entryTokens = entry.get(tokensKey)
+            if entryTokens is None:
+                message = entry[key]
+                entryTokens = tokenized.get(message)
+                if entryTokens is None:
+                    entryTokens = tokenized[message] = self.tokenize(message)
+            tokens.append(entryTokens)
+        return tokens
+
+    def iterTokenize(self, log, key='MESSAGE', tokensKey='TOKENS', grow=False):
+        """
+          Adds the token array of the message of each log entry as a new field, in a single streaming pass
+        """
+
+        for entry in log:
+            entry[tokensKey] = self.tokenize(entry[key], grow)
+            yield entry
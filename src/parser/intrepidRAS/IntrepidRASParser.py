@@ -1,13 +1,87 @@
 import os
 import re
-from src.parser import TableParser
+from src.parser import TableParser, ParsedLogCache, ParserUtil, LogReader, TimeIndex, ExternalSort
+from src.parser.EventTable import EventTable
 
 __author__ = 'Roman'
 
-# The line number where the log format switches
-MAGIC_LINE_NUMBER = 274524
+# Describes the exact character location of each column from the log file, before the log format switches
+LOG_KEYS_PART1 = [
+    ('RECID', 3),
+    ('MSG_ID', 12),
+    ('COMPONENT', 23),
+    ('SUBCOMPONENT', 40),
+    ('ERRCODE', 61),
+    ('SEVERITY', 102),
+    ('EVENT_TIME', 111),
+    ('FLAGS', 138),
+    ('PROCESSOR', 159),
+    ('NODE', 171),
+    ('BLOCK', 173),
+    ('LOCATION', 206),
+    ('SERIALNUMBER', 271),
+    ('ECID', 291),
+    ('MESSAGE', 323)
+]
 
-def parse(logFilePath):
+# Describes the exact character location of each column from the log file, after the log format switches
+LOG_KEYS_PART2 = [
+    ('RECID', 3),
+    ('MSG_ID', 13),
+    ('COMPONENT', 26),
+    ('SUBCOMPONENT', 45),
+    ('ERRCODE', 68),
+    ('SEVERITY', 111),
+    ('EVENT_TIME', 122),
+    ('PROCESSOR', 151),
+    ('BLOCK', 155),
+    ('LOCATION', 190),
+    ('SERIALNUMBER', 257),
+    ('ECID', 279),
+    ('MESSAGE', 296)
+]
+
+# Matches valid record ids
+RECID_REGEX = re.compile("^\d+$")
+
+def parse(logFilePath, columnar=False, cacheDirectory=None, predicates=None, fields=None, start=None, end=None,
+          sort=False):
+    """
+      Parses the Intrepid RAS log into a list of log entries. See iterParse for more information
+
+        @param  columnar        Returns the log as a columnar <code>EventTable</code> instead of a list of dictionaries
+        @param  cacheDirectory  Caches the parsed log in this directory, returning it as a memory-mapped
+                                <code>EventTable</code> that is only parsed again once the log file changes. The
+                                predicates must then be collections of values, TimeRange or AllOf, see
+                                <code>ParserUtil.predicateSpec</code>
+        @param  predicates      Keeps only the entries whose fields pass these predicates, which are checked before
+                                the entries are built, see <code>TableParser.acceptsLine</code>
+        @param  fields          Keeps only these fields in each entry, see <code>iterParseInput</code>
+        @param  start           Keeps only the entries whose EVENT_TIME is at or after this time, see
+                                <code>iterParse</code>
+        @param  end             Keeps only the entries whose EVENT_TIME is before this time
+        @param  sort            Sorts the entries by time, for logs with out-of-order entries. The order is checked
+                                once the log is read, and a log already in order is returned unchanged, see
+                                <code>ExternalSort.sortIfNeeded</code>
+    """
+
+    def parseLog(path, columnar):
+        log = iterParse(path, predicates, fields, start, end)
+        return ExternalSort.sortIfNeeded(log, columnar) if sort else log
+
+    if cacheDirectory is not None:
+        return ParsedLogCache.load(logFilePath, ('IntrepidRAS', LOG_KEYS_PART1, LOG_KEYS_PART2,
+                                                 ParserUtil.predicateSpec(predicates), fields,
+                                                 ParserUtil.TimeRange(start, end), sort),
+                                   lambda path: parseLog(path, True), cacheDirectory)
+
+    log = parseLog(logFilePath, columnar)
+    if isinstance(log, EventTable):
+        return log
+    return EventTable.fromRecords(log) if columnar else list(log)
+
+
+def iterParse(logFilePath, predicates=None, fields=None, start=None, end=None):
     """
       Parser for Blue Gene/P RAS log data from Intrepid. These logs are structured with the following fields
         (the number of unique entries is shown next to each field).
@@ -27,81 +101,94 @@ def parse(logFilePath):
         NODE:           The node id associated with the event? (~33,000)
         PROCESSOR:      The processor id associated with the event? (~2,600)
         FLAGS:          Unknown (~2,000)
+
+      The EVENT_TIME of each entry is also decoded once at parse time, into microseconds since the epoch, as the
+        EVENT_TIMESTAMP field. Entries with an invalid EVENT_TIME are dropped.
+
+      The log may be compressed with gzip, bzip2 or xz, see <code>LogReader.readLines</code>.
+
+      Given a time range [start, end), only the part of the log that may hold it is read, using the sidecar index of
+        the log (see <code>TimeIndex.seek</code>). The table headers before that part are skipped along with it, so its
+        layout is detected from the two known layouts of the log.
+    """
+
+    startOffset, lineNumber, endOffset = TimeIndex.seek(logFilePath, start, end)
+    return ParserUtil.iterDecodeTimestamps(iterParseInput(LogReader.readLines(logFilePath, startOffset, endOffset),
+                                                          ParserUtil.withTimeRange(predicates, start, end), fields))
+
+
+def iterParseInput(input, predicates=None, fields=None):
     """
+      Parses the lines of an Intrepid RAS log in a single pass, yielding the entries with a valid RECID.
 
-    # Describes the exact character location of each column from the log file
-    logKeysPart1 = [
-        ('RECID', 3),
-        ('MSG_ID', 12),
-        ('COMPONENT', 23),
-        ('SUBCOMPONENT', 40),
-        ('ERRCODE', 61),
-        ('SEVERITY', 102),
-        ('EVENT_TIME', 111),
-        ('FLAGS', 138),
-        ('PROCESSOR', 159),
-        ('NODE', 171),
-        ('BLOCK', 173),
-        ('LOCATION', 206),
-        ('SERIALNUMBER', 271),
-        ('ECID', 291),
-        ('MESSAGE', 323)
-    ]
-    logKeysPart2 = [
-        ('RECID', 3),
-        ('MSG_ID', 13),
-        ('COMPONENT', 26),
-        ('SUBCOMPONENT', 45),
-        ('ERRCODE', 68),
-        ('SEVERITY', 111),
-        ('EVENT_TIME', 122),
-        ('PROCESSOR', 151),
-        ('BLOCK', 155),
-        ('LOCATION', 190),
-        ('SERIALNUMBER', 257),
-        ('ECID', 279),
-        ('MESSAGE', 296)
-    ]
-
-    def part1():
-        """
-          Parse the first half of the file (before line <code>MAGIC_LINE_NUMBER</code>)
-        """
-
-        lineNumber = 0
-        with open(logFilePath, "rb") as logFile:
-            for line in logFile:
-                lineNumber += 1
-                if lineNumber < MAGIC_LINE_NUMBER:
-                    yield line
-                else:
+      The column layout of the log is read from the header of each table in the log (the column names followed by a
+        row of dashes underlining each column), so the layout may switch any number of times. When a line does not
+        line up with the current layout, the layouts seen so far and the two known layouts of the Intrepid log are
+        tried in turn, so that a format switch is also detected when it is not preceded by a header.
+
+        @param  predicates  Keeps only the entries whose fields pass these predicates, see <code>parse</code>
+        @param  fields      Keeps only these fields in each entry, along with the EVENT_TIME every entry is
+                            ordered by, or None to keep every field. The columns of the other fields are never sliced.
+    """
+
+    checks = ParserUtil.buildPredicates(predicates)
+
+    # The RECID is always needed to clean out bad logs, but is only kept if it was asked for
+    slicedFields = None
+    dropRecordId = False
+    if fields is not None:
+        slicedFields = set(fields) | set(['RECID', 'EVENT_TIME'])
+        dropRecordId = 'RECID' not in fields
+
+    layouts = [LOG_KEYS_PART1, LOG_KEYS_PART2]
+    logKeys = LOG_KEYS_PART1
+    previousLine = ''
+
+    for line in input:
+
+        # Switch to the layout described by a header
+        if TableParser.isSeparatorLine(line):
+            layout = headerLayout(previousLine, line)
+            if layout is not None:
+                logKeys = layout
+                if layout not in layouts:
+                    layouts.append(layout)
+            continue
+
+        if len(line.strip()) == 0:
+            continue
+        previousLine = line
+
+        # Switch to another layout if the columns do not line up with the current one
+        if not TableParser.fitsLayout(line, logKeys):
+            for layout in layouts:
+                if TableParser.fitsLayout(line, layout):
+                    logKeys = layout
                     break
 
-    def part2():
-        """
-          Parse the second half of the log file (after line <code>MAGIC_LINE_NUMBER</code>)
-        """
-
-        lineNumber = 0
-        with open(logFilePath, "rb") as logFile:
-            for line in logFile:
-                lineNumber += 1
-                if lineNumber >= MAGIC_LINE_NUMBER:
-                    yield line
-
-    #first half of log
-    log = TableParser.parseInput(part1(), logKeysPart1, skipFirstLines=5)
-    #second half of log
-    log.extend(TableParser.parseInput(part2(), logKeysPart2))
-
-    #clean out bad logs
-    regex = re.compile("^\d+$")
-    cleanLog = []
-    for entry in log:
-        if regex.match(entry['RECID']):
-            cleanLog.append(entry)
-
-    return cleanLog
+        if checks and not TableParser.acceptsLine(line, logKeys, checks):
+            continue
+
+        #clean out bad logs inline
+        entry = TableParser.parseLine(line, logKeys, slicedFields)
+        if entry is not None and RECID_REGEX.match(entry['RECID']):
+            if dropRecordId:
+                del entry['RECID']
+            yield entry
+
+
+def headerLayout(header, separatorLine):
+    """
+      Builds the column layout of a table from its header line and the row of dashes underneath it
+
+        @return The list of (column name, start index) pairs, or None if the header does not match the dashes
+    """
+
+    names = header.split()
+    indices = TableParser.columnIndices(separatorLine)
+    if len(names) == 0 or len(names) != len(indices):
+        return None
+    return zip(names, indices)
 
 
 if __name__ == '__main__':
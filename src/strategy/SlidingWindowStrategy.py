@@ -1,5 +1,8 @@
-from datetime import timedelta, datetime
+from datetime import timedelta
+import numpy
 from src.PredictionStrategy import PredictionStrategy
+from src.parser import ParserUtil, ExternalSort
+from src.parser.EventTable import EventTable
 from src.strategy.StrategyError import StrategyError
 
 __author__ = 'jon'
@@ -11,12 +14,16 @@ class SlidingWindowStrategy(PredictionStrategy):
         this will predict whether or not there will be a fatal error.
     """
 
-    def __init__(self, windowDelta=timedelta(hours=5), numberOfSubWindows=5, subWindowIntervalDelta=timedelta(hours=1)):
+    def __init__(self, windowDelta=timedelta(hours=5), numberOfSubWindows=5, subWindowIntervalDelta=timedelta(hours=1),
+                 sortData=False):
         """
           Constructs the properties of the sliding window strategy
             @param  windowDelta             The time delta for each sub-window
             @param  numberOfSubWindows      The number of sub-windows to use in a sliding window
             @param  subWindowIntervalDelta  The time delta for sub-window intervals (must evenly divide 'windowDelta')
+            @param  sortData                Sorts the log data by time before splitting it into windows, if it is out
+                                            of order. Otherwise the data is expected to be sorted already. The data is
+                                            sorted in memory, see <code>sortedData</code>.
 
         """
 
@@ -28,6 +35,7 @@ class SlidingWindowStrategy(PredictionStrategy):
         self.windowDelta = windowDelta
         self.subWindowIntervalDelta = subWindowIntervalDelta
         self.numberOfSubWindows = numberOfSubWindows
+        self.sortData = sortData
 
         if windowDelta.seconds % subWindowIntervalDelta.seconds is not 0:
             raise StrategyError('Error parsing windowed log data, cannot divide sub-windows into smaller intervals evenly!')
@@ -42,6 +50,9 @@ class SlidingWindowStrategy(PredictionStrategy):
             raise AssertionError('Training data for SlidingWindow must be non-empty!')
         else:
 
+            if self.sortData:
+                data = self.sortedData(data)
+
             # Parse the training data into windows & intervals
             windowedLogData = self.splitDataToIntervals(data, self.windowDelta, self.numberOfSubWindows)
             intervalWindowedLogData = self.splitDataToIntervals(data, self.subWindowIntervalDelta, self.numberOfSubWindows)
@@ -51,6 +62,22 @@ class SlidingWindowStrategy(PredictionStrategy):
             return self.parseWindowedLogData(windowedLogData, intervalWindowedLogData)
 
 
+    def sortedData(self, data):
+        """
+          Helper function to sort the log data by time, returning it unchanged if it is already sorted. The sort is
+            stable, so events with the same timestamp keep their order. This only handles data already held in memory,
+            as a list or an <code>EventTable</code>: a log stream too large to hold in memory has to be sorted before
+            it is loaded instead, see <code>ExternalSort.sort</code>.
+        """
+
+        if isinstance(data, EventTable):
+            return data.sortedByTime()
+
+        if ExternalSort.isSorted(data):
+            return data
+        return sorted(data, key=ParserUtil.recordTimestamp)
+
+
     def parseWindowedLogData(self, windowedLogData, intervalWindowedLogData):
         """
           Helper function to parse the windowed log data (log data properly divided into sliding windows for learning)
@@ -61,13 +88,43 @@ class SlidingWindowStrategy(PredictionStrategy):
         raise NotImplementedError("Cannot parse windowed log data in abstract class 'SlidingWindow'")
 
 
+    def countValues(self, events, key):
+        """
+          Helper function to count the occurrences of each value of the field <code>key</code> among the given events.
+            Columnar <code>EventTable</code> windows are counted with a single vectorized pass over their codes.
+
+            @return A dictionary of value -> number of events holding it
+        """
+
+        if isinstance(events, EventTable):
+            if len(events) > 0 and key not in events.columns:
+                raise StrategyError('Error parsing windowed log data, could not find %s field!' % key)
+            return events.valueCounts(key)
+
+        counts = {}
+        for logEvent in events:
+            # Fail to parse the log data if it's invalid (in that it doesn't contain the expected field)
+            if key not in logEvent:
+                raise StrategyError('Error parsing windowed log data, could not find %s field!' % key)
+            counts[logEvent[key]] = counts.get(logEvent[key], 0) + 1
+        return counts
+
+
     def splitDataToIntervals(self, data, interval, numberOfIntervals):
         """
           Helper function to split log data into intervals
         """
 
+        # Time-sorted columnar data can be split by binary searching its timestamp column
+        if isinstance(data, EventTable) and data.timestamps is not None and data.isSorted():
+            return self.splitTableToIntervals(data, interval, numberOfIntervals)
+
+        # Decode each timestamp once (or use the timestamps decoded at parse time), in microseconds since the epoch
+        timestamps = [ParserUtil.recordTimestamp(entry) for entry in data]
+        windowDelta = ParserUtil.microseconds(self.windowDelta)
+
         # The end timestamp of the the next sub-window, initialized to first timestamp plus time delta
-        endSubWindowTimestamp = datetime.strptime(data[0]['EVENT_TIME'], self.TIMESTAMP_FORMAT) + interval
+        endSubWindowTimestamp = timestamps[0] + ParserUtil.microseconds(interval)
 
         # The list of list of lists of lists (log entries broken into windows and sub windows)
         windowedLogData = []
@@ -82,7 +139,7 @@ class SlidingWindowStrategy(PredictionStrategy):
             innerDataIndex = dataIndex
             while subWindowIndex < numberOfIntervals and innerDataIndex < len(data):
                 subWindowData = []
-                nextTimestamp = datetime.strptime(data[innerDataIndex]['EVENT_TIME'], self.TIMESTAMP_FORMAT)
+                nextTimestamp = timestamps[innerDataIndex]
 
                 # Iterate across all log entries in this sub window (or gracefully handle when we run out of data)
                 while nextTimestamp < endSubWindowTimestamp and innerDataIndex < len(data):
@@ -90,19 +147,56 @@ class SlidingWindowStrategy(PredictionStrategy):
 
                     innerDataIndex += 1
                     if innerDataIndex < len(data):
-                        nextTimestamp = datetime.strptime(data[innerDataIndex]['EVENT_TIME'], self.TIMESTAMP_FORMAT)
+                        nextTimestamp = timestamps[innerDataIndex]
 
                 windowData.append(subWindowData)
                 subWindowIndex += 1
 
-                endSubWindowTimestamp += self.windowDelta
+                endSubWindowTimestamp += windowDelta
 
-            endSubWindowTimestamp = nextFirstEndSubWindowTimestamp + self.windowDelta
-            while dataIndex < len(data) and datetime.strptime(data[dataIndex]['EVENT_TIME'],
-                self.TIMESTAMP_FORMAT) < nextFirstEndSubWindowTimestamp:
+            endSubWindowTimestamp = nextFirstEndSubWindowTimestamp + windowDelta
+            while dataIndex < len(data) and timestamps[dataIndex] < nextFirstEndSubWindowTimestamp:
                 dataIndex += 1
 
             if len(windowData) >= numberOfIntervals:
                 windowedLogData.append(windowData)
 
         return windowedLogData
+
+
+    def splitTableToIntervals(self, table, interval, numberOfIntervals):
+        """
+          Helper function to split a time-sorted <code>EventTable</code> into intervals, using the same window boundaries
+            as <code>splitDataToIntervals</code>. Each sub-window is a slice of the table, sharing its columns.
+        """
+
+        timestamps = table.timestamps
+        windowDelta = ParserUtil.microseconds(self.windowDelta)
+
+        # The end timestamp of the the next sub-window, initialized to first timestamp plus time delta
+        endSubWindowTimestamp = int(timestamps[0]) + ParserUtil.microseconds(interval)
+
+        windowedLogData = []
+        dataIndex = 0
+        while dataIndex < len(table):
+            windowData = []
+            nextFirstEndSubWindowTimestamp = endSubWindowTimestamp
+
+            # Each sub-window holds every remaining entry before its end timestamp
+            innerDataIndex = dataIndex
+            subWindowIndex = 0
+            while subWindowIndex < numberOfIntervals and innerDataIndex < len(table):
+                endIndex = max(innerDataIndex, int(numpy.searchsorted(timestamps, endSubWindowTimestamp, 'left')))
+                windowData.append(table[innerDataIndex:endIndex])
+                innerDataIndex = endIndex
+
+                subWindowIndex += 1
+                endSubWindowTimestamp += windowDelta
+
+            endSubWindowTimestamp = nextFirstEndSubWindowTimestamp + windowDelta
+            dataIndex = max(dataIndex, int(numpy.searchsorted(timestamps, nextFirstEndSubWindowTimestamp, 'left')))
+
+            if len(windowData) >= numberOfIntervals:
+                windowedLogData.append(windowData)
+
+        return windowedLogData
@@ -72,14 +72,9 @@ class EventLevelStrategy(SlidingWindowClassificationStrategy):
                     for key in self.severities:
                         eventCounts[key] = 0
 
-                    for logEvent in subWindow:
-                        # Fail to parse the log data if it's invalid (in that it doesn't contain the expected 'SEVERITY' field)
-                        if self.severityKey not in logEvent:
-                            raise  StrategyError(
-                                'Error parsing windowed log data, could not find %s field!' % self.severityKey)
-
-                        # Tally an event of this severity
-                        eventCounts[logEvent[self.severityKey]] += 1
+                    # Tally the events of each severity (failing on events without the expected 'SEVERITY' field)
+                    for severity, count in self.countValues(subWindow, self.severityKey).iteritems():
+                        eventCounts[severity] += count
 
                     # Append the counts for this sub-window
                     supportVector = []
@@ -1,7 +1,10 @@
 from json import load
+import numpy
+import random
 import unittest
 import os
 from src.filter import Filterer
+from src.parser.EventTable import EventTable
 
 __author__ = 'Roman'
 
@@ -34,4 +37,100 @@ class FiltererTest(unittest.TestCase):
         mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/unsimilarLogs.json'))
         mockDictionary = set(["instruction", "cache", "parity", "error", "correct", "generat", "core", "NUMBER", "lN", "edram", "detect", "and", "some", "other", "words", "and", "stuff"])
         resultLog = Filterer.filter(mockLog, mockDictionary)
-        self.assertEqual(len(resultLog), 3)
\ No newline at end of file
+        self.assertEqual(len(resultLog), 3)
+
+    def testTableLog(self):
+        mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/unsimilarLogs.json'))
+        mockDictionary = set(["instruction", "cache", "parity", "error", "correct", "generat", "core", "NUMBER", "lN", "edram", "detect", "and", "some", "other", "words", "and", "stuff"])
+        resultLog = Filterer.filter(EventTable.fromRecords(mockLog), mockDictionary)
+        self.assertIsInstance(resultLog, EventTable)
+        self.assertEqual(Filterer.filter(mockLog, mockDictionary), list(resultLog))
+
+    def testLastLogKept(self):
+        mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/unsimilarLogs.json'))
+        mockLog[-1] = dict(mockLog[-1], MESSAGE="some other words")
+        mockLog[0] = dict(mockLog[0], CAT="ignore")
+        originalLog = [dict(entry) for entry in mockLog]
+        resultLog = Filterer.filter(mockLog, None)
+        self.assertEqual([mockLog[1], mockLog[2], mockLog[5], mockLog[8]], resultLog)
+        self.assertEqual(originalLog, mockLog)
+        self.assertEqual([1, 0, 0, 1, 1, 0, 1, 1, 0], list(Filterer.redundantEvents(EventTable.fromRecords(mockLog))))
+
+    def testBatched(self):
+        mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/similarLogsSpreadApart.json'))
+        mockLog += load(open(self.projectRoot + '/test/filter/parsedLog/unsimilarLogs.json'))
+        mockLog.sort(key=lambda entry: entry['EVENT_TIME'])
+        for batchSize in [1, 2, 5, 256]:
+            self.assertEqual(Filterer.redundantEvents(mockLog), Filterer.batchedRedundantEvents(mockLog, None, batchSize))
+            self.assertEqual(Filterer.filter(mockLog), list(Filterer.filter(EventTable.fromRecords(mockLog), None, batchSize)))
+
+    def testLsh(self):
+        mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/similarLogsSpreadApart.json'))
+        mockLog += load(open(self.projectRoot + '/test/filter/parsedLog/unsimilarLogs.json'))
+        mockLog.sort(key=lambda entry: entry['EVENT_TIME'])
+        mockDictionary = set(["instruction", "cache", "parity", "error", "correct", "generat", "core", "NUMBER", "lN", "edram", "detect", "and", "some", "other", "words", "and", "stuff"])
+        self.assertEqual(Filterer.filter(mockLog, mockDictionary), Filterer.filter(mockLog, mockDictionary, lsh=True))
+        self.assertEqual(Filterer.redundantEvents(mockLog), Filterer.lshRedundantEvents(EventTable.fromRecords(mockLog)))
+
+    def testBlockingKeys(self):
+        mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/similarLogs.json'))
+        for index, entry in enumerate(mockLog):
+            entry['SEVERITY'] = ["INFO", "FATAL"][index % 2]
+            entry['LOCATION'] = ["R00-M0-N1", "R00-M1-N2", "R01-M0-N3"][index % 3]
+        mockDictionary = set(["instruction", "cache", "parity", "error", "correct", "some", "other", "words", "and", "stuff"])
+        self.assertEqual(1, len(Filterer.filter(mockLog, mockDictionary, blockingKeys=[])))
+        self.assertEqual(2, len(Filterer.filter(mockLog, mockDictionary, blockingKeys=['SEVERITY'])))
+        self.assertEqual(4, len(Filterer.filter(mockLog, mockDictionary, blockingKeys=['SEVERITY', Filterer.FieldPrefix('LOCATION', 3)])))
+
+        # Identical messages are never correlated above 1.0, so every event of the block is kept
+        blockThresholds = {("FATAL",): lambda seconds: 1.0}
+        resultLog = Filterer.filter(mockLog, mockDictionary, blockingKeys=['SEVERITY'], blockThresholds=blockThresholds)
+        self.assertEqual([mockLog[0], mockLog[1], mockLog[3], mockLog[5], mockLog[7]], resultLog)
+        for batchSize in [1, 4]:
+            self.assertEqual(resultLog, Filterer.filter(mockLog, mockDictionary, batchSize, blockingKeys=['SEVERITY'], blockThresholds=blockThresholds))
+        self.assertEqual(resultLog, Filterer.filter(mockLog, mockDictionary, lsh=True, blockingKeys=['SEVERITY'], blockThresholds=blockThresholds))
+
+    def testParallel(self):
+        randomGenerator = random.Random(0)
+        words = ["instruction", "cache", "parity", "error", "correct", "generat", "core", "NUMBER", "edram", "detect"]
+        mockLog = []
+        for index in xrange(300):
+            mockLog.append({'CAT': randomGenerator.choice(["-", "-", "ignore"]),
+                            'EVENT_TIMESTAMP': index * 30 * 1000000,
+                            'MESSAGE': " ".join(randomGenerator.sample(words, randomGenerator.randint(1, 5)))})
+        resultLog = Filterer.filter(mockLog)
+
+        reconcileSize = Filterer.RECONCILE_SIZE
+        Filterer.RECONCILE_SIZE = 4
+        try:
+            self.assertEqual(resultLog, Filterer.filter(mockLog, processes=2))
+            for partitions in [3, 7]:
+                self.assertEqual(Filterer.redundantEvents(mockLog), Filterer.parallelRedundantEvents(mockLog, None, 2, partitions=partitions))
+                self.assertEqual(Filterer.lshRedundantEvents(mockLog), Filterer.parallelRedundantEvents(mockLog, None, 2, Filterer.lshRedundantEvents, partitions))
+        finally:
+            Filterer.RECONCILE_SIZE = reconcileSize
+
+    def testIterFilter(self):
+        mockLog = load(open(self.projectRoot + '/test/filter/parsedLog/similarLogsSpreadApart.json'))
+        mockLog += load(open(self.projectRoot + '/test/filter/parsedLog/unsimilarLogs.json'))
+        mockLog.sort(key=lambda entry: entry['EVENT_TIME'])
+        mockDictionary = set(["instruction", "cache", "parity", "error", "correct", "generat", "core", "NUMBER", "lN", "edram", "detect", "and", "some", "other", "words", "and", "stuff"])
+
+        read = []
+        def stream():
+            for entry in mockLog:
+                read.append(entry)
+                yield entry
+
+        resultLog = Filterer.iterFilter(stream(), mockDictionary)
+        self.assertEqual(mockLog[0], next(resultLog))
+        self.assertEqual(1, len(read))
+        self.assertEqual(Filterer.filter(mockLog, mockDictionary), [mockLog[0]] + list(resultLog))
+        self.assertEqual(Filterer.filter(mockLog), list(Filterer.iterFilter(mockLog, Filterer.vocabulary(mockLog))))
+        self.assertRaises(ValueError, list, Filterer.iterFilter(mockLog, None))
+
+    def testRequiredCorrelations(self):
+        seconds = [0, 30, 60, 61, 300, 301, 600, 601, 1200, 1201, 86400]
+        self.assertEqual([Filterer.getRequiredCorrelation(second) for second in seconds],
+                         list(Filterer.requiredCorrelations(numpy.array(seconds) / 1.0)))
+
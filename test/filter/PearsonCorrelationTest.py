@@ -1,4 +1,5 @@
 from src.filter import PearsonCorrelation
+from src.parser.Vocabulary import Vocabulary
 
 __author__ = 'Roman'
 
@@ -37,4 +38,39 @@ class PearsonCorrelationTest(unittest.TestCase):
         log2 = {'MESSAGE':"hello I am something else"}
         dictionary = set(["hello", "I", "am", "a", "log", "file", "these", "are", "some", "other", "words", "something", "else"])
         corr = PearsonCorrelation.correlation(log1, log2, dictionary)
-        self.assertGreater(corr, 0.0)
\ No newline at end of file
+        self.assertGreater(corr, 0.0)
+
+    def testTokenCorrelation(self):
+        log1 = {'MESSAGE':"hello I am a log file"}
+        log2 = {'MESSAGE':"hello I am something else"}
+        dictionary = set(["hello", "I", "am", "a", "log", "file", "these", "are", "some", "other", "words", "something", "else"])
+        vocabulary = Vocabulary(sorted(dictionary))
+        corr = PearsonCorrelation.tokenCorrelation(vocabulary.tokenize(log1['MESSAGE']), vocabulary.tokenize(log2['MESSAGE']), len(vocabulary))
+        self.assertEqual(PearsonCorrelation.correlation(log1, log2, dictionary), corr)
+        self.assertEqual(corr, PearsonCorrelation.correlation(log1, log2, vocabulary))
+
+    def testBitsetCorrelation(self):
+        tokens1 = [0, 1, 2, 3, 4, 5]
+        tokens2 = [0, 1, 2, 11, 12]
+        corr = PearsonCorrelation.tokenCorrelation(PearsonCorrelation.bitset(tokens1), PearsonCorrelation.bitset(tokens2), 13)
+        self.assertEqual(PearsonCorrelation.tokenCorrelation(tokens1, tokens2, 13), corr)
+        self.assertGreater(corr, 0.0)
+
+    def testUndefinedCorrelation(self):
+        log1 = {'MESSAGE':"hello I am a log file"}
+        log2 = {'MESSAGE':"Bobby likes ice cream"}
+        dictionary = set(["hello", "I", "am", "a", "log", "file"])
+        self.assertEqual(PearsonCorrelation.correlation(log1, log1, dictionary), 1.0)
+        self.assertEqual(PearsonCorrelation.correlation(log1, log2, dictionary), 0.0)
+        self.assertEqual(PearsonCorrelation.correlation(log2, log2, dictionary), 1.0)
+        self.assertEqual(PearsonCorrelation.tokenCorrelation(0, PearsonCorrelation.bitset([1]), 6), 0.0)
+
+    def testCorrelationMatrix(self):
+        tokensList1 = [[0, 1, 2, 3, 4, 5], [], [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]]
+        tokensList2 = [[0, 1, 2, 11, 12], [0, 1, 2, 3, 4, 5], [], [7]]
+        corr = PearsonCorrelation.correlationMatrix(tokensList1, tokensList2, 13)
+        self.assertEqual((3, 4), corr.shape)
+        for i, tokens1 in enumerate(tokensList1):
+            for j, tokens2 in enumerate(tokensList2):
+                self.assertEqual(PearsonCorrelation.tokenCorrelation(tokens1, tokens2, 13), corr[i, j])
+
@@ -0,0 +1,104 @@
+from json import load
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser import ParserUtil
+from src.parser.EventTable import EventTable
+from src.parser.intrepidRAS import IntrepidRASParser
+
+__author__ = 'Roman'
+
+class EventTableTest(unittest.TestCase):
+    """
+      Unit tests for the EventTable class
+    """
+
+    def setUp(self):
+        """
+          Setup before each test
+        """
+
+        self.projectRoot = os.environ['PROJECT_ROOT']
+        self.expectedParsedLog = load(open(self.projectRoot + '/test/parser/intrepid/json/ExpectedParsedLog.json'))
+        self.logPath = self.projectRoot + '/test/parser/intrepid/log/SampleLog'
+
+    def testColumnarParseMatchesRecords(self):
+        """
+          Test that parsing the 'SampleLog' file into a table decodes to the same log data as the default parse
+        """
+
+        # Test
+        table = IntrepidRASParser.parse(self.logPath, columnar=True)
+
+        # Verify
+        self.assertTrue(isinstance(table, EventTable))
+        self.assertEqual(len(self.expectedParsedLog), len(table))
+        self.assertEqual(self.expectedParsedLog, list(table))
+        self.assertEqual(self.expectedParsedLog[-1], table[-1])
+
+    def testColumnEncoding(self):
+        """
+          Test that timestamps are stored as integers, and that low cardinality fields are dictionary-encoded
+        """
+
+        # Test
+        table = EventTable.fromRecords(self.expectedParsedLog)
+
+        # Verify
+        self.assertEqual('int64', table.timestamps.dtype.name)
+        self.assertEqual(ParserUtil.eventTimestamp(self.expectedParsedLog[0]['EVENT_TIME']), table.timestamps[0])
+        self.assertEqual(['KERNEL'], table.dictionaries['COMPONENT'])
+        self.assertFalse('MESSAGE' in table.dictionaries)
+        self.assertEqual({'KERNEL': len(self.expectedParsedLog)}, table.valueCounts('COMPONENT'))
+
+    def testSliceAndTake(self):
+        """
+          Test that slices and reordered tables share the encoding of the original table
+        """
+
+        # Setup
+        table = EventTable.fromRecords(self.expectedParsedLog)
+
+        # Test
+        tail = table[1:]
+        reversedTable = table.take(range(len(table) - 1, -1, -1))
+
+        # Verify
+        self.assertEqual(self.expectedParsedLog[1:], list(tail))
+        self.assertEqual(list(reversed(self.expectedParsedLog)), list(reversedTable))
+        self.assertEqual(0, len(table[len(table):]))
+
+    def testSaveAndLoad(self):
+        """
+          Test that a saved table is loaded with the same log data, including values that are not valid UTF-8
+        """
+
+        # Setup
+        records = [dict(entry) for entry in self.expectedParsedLog]
+        records[0]['COMPONENT'] = ''.join(chr(code) for code in xrange(0x80, 0x100))
+        records[0]['MESSAGE'] = 'caf\xe9 \xff\xfe'
+        records[1]['COMPONENT'] = 'caf\xc3\xa9'
+        table = EventTable.fromRecords(records)
+
+        scratchDirectory = tempfile.mkdtemp()
+        try:
+            # Test
+            table.save(scratchDirectory)
+            loaded = EventTable.load(scratchDirectory)
+
+            # Verify
+            self.assertEqual(records, list(loaded))
+            self.assertTrue(isinstance(loaded.dictionaries['COMPONENT'][0], str))
+        finally:
+            shutil.rmtree(scratchDirectory)
+
+    def testEmpty(self):
+        """
+          Test that building a table from no records results in an empty table
+        """
+
+        table = EventTable.fromRecords([])
+
+        self.assertEqual(0, len(table))
+        self.assertEqual([], list(table))
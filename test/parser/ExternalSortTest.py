@@ -0,0 +1,80 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from src.parser import ExternalSort, ParserUtil
+from src.parser.EventTable import EventTable
+
+__author__ = 'Roman'
+
+class ExternalSortTest(unittest.TestCase):
+    """
+      Unit tests for the ExternalSort module
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, building a log with out-of-order entries and several entries per timestamp
+        """
+
+        self.scratchDirectory = tempfile.mkdtemp()
+
+        start = ParserUtil.eventTimestamp('2009-01-05-00.00.00.000000')
+        randomGenerator = random.Random(0)
+        self.log = [{'EVENT_TIME': ParserUtil.eventTime(start + randomGenerator.randint(0, 50) * 1000000), 'ID': index}
+                    for index in xrange(500)]
+        self.expectedLog = sorted(self.log, key=lambda entry: entry['EVENT_TIME'])
+
+        ExternalSort.MERGE_WIDTH, self.mergeWidth = 4, ExternalSort.MERGE_WIDTH
+
+    def tearDown(self):
+        ExternalSort.MERGE_WIDTH = self.mergeWidth
+        shutil.rmtree(self.scratchDirectory)
+
+    def testSortInMemory(self):
+        """
+          Test that a log fitting in a single run is sorted without spilling it to disk
+        """
+
+        sortedLog = list(ExternalSort.sort(iter(self.log), temporaryDirectory=self.scratchDirectory))
+        self.assertEqual(self.expectedLog, sortedLog)
+        self.assertEqual([], os.listdir(self.scratchDirectory))
+
+    def testSortRuns(self):
+        """
+          Test that sorting a log in many runs, merged in several passes, results in a stable sort, and that the runs are
+            deleted afterwards
+        """
+
+        sortedLog = ExternalSort.sort(iter(self.log), runSize=7, temporaryDirectory=self.scratchDirectory)
+        self.assertEqual(self.expectedLog[0], next(sortedLog))
+        self.assertEqual(1, len(os.listdir(self.scratchDirectory)))
+
+        self.assertEqual(self.expectedLog[1:], list(sortedLog))
+        self.assertTrue(ExternalSort.isSorted(self.expectedLog))
+        self.assertEqual([], os.listdir(self.scratchDirectory))
+
+    def testSortIfNeeded(self):
+        """
+          Test that a log read into memory is only sorted if it is out of order, without spilling it to disk
+        """
+
+        self.assertEqual(self.expectedLog, ExternalSort.sortIfNeeded(iter(self.log)))
+        self.assertEqual(self.expectedLog, list(ExternalSort.sortIfNeeded(iter(self.log), columnar=True)))
+
+        orderedLog = ExternalSort.sortIfNeeded(iter(self.expectedLog))
+        self.assertTrue(all(entry is expectedEntry for entry, expectedEntry in zip(orderedLog, self.expectedLog)))
+        orderedTable = ExternalSort.sortIfNeeded(iter(self.expectedLog), columnar=True)
+        self.assertTrue(orderedTable.isSorted())
+        self.assertTrue(orderedTable.sortedByTime() is orderedTable)
+        self.assertEqual([], os.listdir(self.scratchDirectory))
+
+    def testSortTable(self):
+        """
+          Test that the rows of a columnar log can be sorted
+        """
+
+        sortedLog = ExternalSort.sort(EventTable.fromRecords(self.log), runSize=100,
+                                      temporaryDirectory=self.scratchDirectory)
+        self.assertEqual(self.expectedLog, list(sortedLog))
@@ -1,5 +1,7 @@
 from json import load
 import os
+import shutil
+import tempfile
 import unittest
 from src.parser import  ParserUtil
 from src.parser.intrepidRAS import IntrepidRASParser
@@ -66,6 +68,70 @@ class IntrepidRASParserTest(unittest.TestCase):
         self.assertEqual(expectedParsedLog, parsedLog)
         self.assertEqual(expectedSummarizedLog, summarizedLog)
 
+    def testParseWithPredicates(self):
+        """
+          Test that parsing the 'SampleLog' file with predicates on the raw fields only results in the entries
+            passing them
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/intrepid/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/intrepid/log/SampleLog'
+
+        # Test & verify
+        self.assertEqual(expectedParsedLog[1:], IntrepidRASParser.parse(logPath, predicates={
+            'EVENT_TIME': ParserUtil.TimeRange('2009-01-05-00.05.00.000000', '2009-01-06-00.00.00.000000')
+        }))
+        self.assertEqual(expectedParsedLog[:1], IntrepidRASParser.parse(logPath, predicates={
+            'SEVERITY': ['WARN', 'FATAL'],
+            'ERRCODE': lambda errorCode: errorCode.endswith('symbol_error')
+        }))
+        self.assertEqual([], IntrepidRASParser.parse(logPath, predicates={'SEVERITY': set(['FATAL'])}))
+
+    def testParseSorted(self):
+        """
+          Test that sorting a log with out-of-order entries results in the expected log data, and that a log already in
+            order is returned unchanged
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/intrepid/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/intrepid/log/SampleLog'
+        lines = open(logPath).readlines()
+        lines[6], lines[8] = lines[8], lines[6]
+
+        scratchDirectory = tempfile.mkdtemp()
+        try:
+            shuffledLogPath = os.path.join(scratchDirectory, 'SampleLog')
+            with open(shuffledLogPath, 'w') as shuffledLogFile:
+                shuffledLogFile.writelines(lines)
+
+            # Test & verify
+            self.assertEqual(list(reversed(expectedParsedLog)), IntrepidRASParser.parse(shuffledLogPath))
+            self.assertEqual(expectedParsedLog, IntrepidRASParser.parse(shuffledLogPath, sort=True))
+            self.assertEqual(expectedParsedLog, list(IntrepidRASParser.parse(shuffledLogPath, columnar=True,
+                                                                             sort=True)))
+            self.assertEqual(expectedParsedLog, IntrepidRASParser.parse(logPath, sort=True))
+        finally:
+            shutil.rmtree(scratchDirectory)
+
+    def testParseWithFields(self):
+        """
+          Test that parsing the 'SampleLog' file with a projection only keeps the given fields, along with the event
+            time
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/intrepid/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/intrepid/log/SampleLog'
+        fields = ['SEVERITY', 'EVENT_TIME', 'EVENT_TIMESTAMP', 'LOCATION']
+
+        # Test
+        parsedLog = IntrepidRASParser.parse(logPath, fields=['SEVERITY', 'LOCATION'])
+
+        # Verify
+        self.assertEqual([dict((key, entry[key]) for key in fields) for entry in expectedParsedLog], parsedLog)
+
     def testRegressionTestEmptyFields(self):
         """
             Test the case where an row with fields missing is still captured correctly
@@ -96,5 +162,25 @@ class IntrepidRASParserTest(unittest.TestCase):
 
         self.assertEqual([], parsedLog)
 
+    def testFormatSwitch(self):
+        """
+            Tests that the column layout is switched whenever a new header appears, or when the columns stop lining up
+        """
+
+        #Setup
+        logPath = self.projectRoot + '/test/parser/intrepid/log/SampleLog-FormatSwitch'
+
+        #Test
+        parsedLog = IntrepidRASParser.parse(logPath)
+
+        #Verify
+        self.assertEqual(['26123930', '26123943', '26124001', '26124002', '26124003'], [entry['RECID'] for entry in parsedLog])
+        self.assertEqual(['-', '-', None, '-', None], [entry.get('FLAGS') for entry in parsedLog])
+        self.assertEqual(['0', '0', '12', '0', '7'], [entry['PROCESSOR'] for entry in parsedLog])
+        self.assertEqual('2009-06-05-00.02.51.162211', parsedLog[2]['EVENT_TIME'])
+        self.assertEqual('Correctable error after the format switch', parsedLog[2]['MESSAGE'])
+        self.assertEqual('FATAL', parsedLog[4]['SEVERITY'])
+        self.assertEqual('Boot failed', parsedLog[4]['MESSAGE'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+from json import load
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser import RegexParser, TableParser
+
+__author__ = 'Roman'
+
+class LogFollowerTest(unittest.TestCase):
+    """
+      Unit tests for following growing logs with the LogFollower module
+    """
+
+    #sample test keys, as in RegexParserTest and TableParserTest
+    regexKeys = [
+        ('ID', "\d+"),
+        ('NAME', "\w+"),
+        ('TELEPHONE', "[0-9()-]+")
+    ]
+    tableKeys = [
+        ('ID', 5),
+        ('NAME', 10),
+        ('TELEPHONE', 27)
+    ]
+
+    def setUp(self):
+        """
+          Setup before each test, creating a scratch directory for the growing log and its checkpoint
+        """
+
+        self.projectRoot = os.environ['PROJECT_ROOT']
+        self.scratchDirectory = tempfile.mkdtemp()
+        self.logPath = os.path.join(self.scratchDirectory, 'SampleLog')
+        self.checkpointPath = os.path.join(self.scratchDirectory, 'SampleLog.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.scratchDirectory)
+
+    def append(self, data):
+        with open(self.logPath, 'ab') as logFile:
+            logFile.write(data)
+
+    def testFollowGrowingLog(self):
+        """
+          Test that following a log appended to in pieces, split in the middle of lines, results in the log data
+            of the whole log, with each line parsed once
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        data = open(self.projectRoot + '/test/parser/regex/log/SampleLog', 'rb').read()
+        pieces = [data[:len(data) / 3], data[len(data) / 3:len(data) / 2], '', data[len(data) / 2:], '\n']
+
+        # Test
+        parsedLog = []
+        for piece in pieces:
+            self.append(piece)
+            parsedLog += RegexParser.follow(self.logPath, self.checkpointPath, self.regexKeys,
+                                            skipFirstLines=2)
+
+            # The last line is only parsed once its newline has been written
+            if piece == pieces[-2]:
+                self.assertEqual(expectedParsedLog[:-1], parsedLog)
+
+        # Verify
+        self.assertEqual(expectedParsedLog, parsedLog)
+        self.assertEqual([], RegexParser.follow(self.logPath, self.checkpointPath, self.regexKeys))
+
+    def testFollowRotatedLog(self):
+        """
+          Test that a log that is truncated, or replaced by a new file, is read again from the beginning
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/table/json/ExpectedParsedLog.json'))
+        data = open(self.projectRoot + '/test/parser/table/log/SampleLog', 'rb').read() + '\n'
+        self.append(data)
+        TableParser.follow(self.logPath, self.checkpointPath, self.tableKeys, skipFirstLines=2)
+
+        # Test & verify truncation
+        open(self.logPath, 'wb').close()
+        self.assertEqual([], TableParser.follow(self.logPath, self.checkpointPath, self.tableKeys,
+                                                skipFirstLines=2))
+        self.append(data)
+        self.assertEqual(expectedParsedLog, TableParser.follow(self.logPath, self.checkpointPath,
+                                                               self.tableKeys, skipFirstLines=2))
+
+        # Test & verify rotation
+        os.rename(self.logPath, self.logPath + '.1')
+        self.append(data)
+        self.assertEqual(expectedParsedLog, TableParser.follow(self.logPath, self.checkpointPath,
+                                                               self.tableKeys, skipFirstLines=2))
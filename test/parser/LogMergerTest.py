@@ -0,0 +1,66 @@
+import unittest
+from src.parser import LogMerger
+from src.parser.EventTable import EventTable
+
+__author__ = 'Roman'
+
+class LogMergerTest(unittest.TestCase):
+    """
+      Unit tests for the LogMerger module
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, building two logs sorted by time
+        """
+
+        self.rasLog = [
+            {'EVENT_TIME': '2009-01-05-00.02.51.162211', 'MESSAGE': 'ras 1'},
+            {'EVENT_TIME': '2009-01-05-00.06.44.106651', 'MESSAGE': 'ras 2'},
+            {'EVENT_TIME': '2009-01-05-00.09.00.000000', 'MESSAGE': 'ras 3'}
+        ]
+        self.kernelLog = [
+            {'EVENT_TIME': '2009-01-05-00.00.00.000000', 'MESSAGE': 'kernel 1'},
+            {'EVENT_TIME': '2009-01-05-00.06.44.106651', 'MESSAGE': 'kernel 2'}
+        ]
+
+    def testMerge(self):
+        """
+          Test that merging logs results in all of their entries sorted by time, keeping the order of ties
+        """
+
+        mergedLog = list(LogMerger.merge([iter(self.rasLog), iter(self.kernelLog)]))
+        self.assertEqual(['kernel 1', 'ras 1', 'ras 2', 'kernel 2', 'ras 3'], [entry['MESSAGE'] for entry in mergedLog])
+
+    def testMergeEmpty(self):
+        """
+          Test that merging empty logs results in an empty log
+        """
+
+        self.assertEqual([], list(LogMerger.merge([])))
+        self.assertEqual(self.rasLog, list(LogMerger.merge([[], self.rasLog, []])))
+
+    def testMergeNamedLogs(self):
+        """
+          Test that the merged entries are paired with the name of their log, without being modified
+        """
+
+        mergedLog = list(LogMerger.merge({'ras': self.rasLog, 'kernel': self.kernelLog}, sources=True))
+        self.assertEqual(['kernel', 'ras', 'kernel', 'ras', 'ras'], [name for name, entry in mergedLog])
+        self.assertEqual(['kernel 1', 'ras 1', 'kernel 2', 'ras 2', 'ras 3'],
+                         [entry['MESSAGE'] for name, entry in mergedLog])
+        self.assertEqual(set(['EVENT_TIME', 'MESSAGE']), set(key for name, entry in mergedLog for key in entry))
+
+        mergedTables = LogMerger.merge([EventTable.fromRecords(self.rasLog), EventTable.fromRecords(self.kernelLog)],
+                                       sources=True)
+        self.assertEqual([1, 0, 0, 1, 0], [index for index, entry in mergedTables])
+
+    def testMergeTables(self):
+        """
+          Test that columnar logs can be merged, and that the merged log can be stored as a table
+        """
+
+        mergedLog = LogMerger.merge([EventTable.fromRecords(self.rasLog), EventTable.fromRecords(self.kernelLog)])
+        table = EventTable.fromRecords(mergedLog)
+        self.assertTrue(table.isSorted())
+        self.assertEqual(5, len(table))
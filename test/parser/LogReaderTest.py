@@ -0,0 +1,87 @@
+import bz2
+from json import load
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from src.parser import LogReader
+from src.parser.intrepidRAS import IntrepidRASParser
+
+__author__ = 'Roman'
+
+class LogReaderTest(unittest.TestCase):
+    """
+      Unit tests for the LogReader module
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, compressing the sample log into a scratch directory
+        """
+
+        self.projectRoot = os.environ['PROJECT_ROOT']
+        self.expectedParsedLog = load(open(self.projectRoot + '/test/parser/intrepid/json/ExpectedParsedLog.json'))
+        self.logPath = self.projectRoot + '/test/parser/intrepid/log/SampleLog'
+        self.scratchDirectory = tempfile.mkdtemp()
+
+        with open(self.logPath, 'rb') as logFile:
+            self.lines = logFile.readlines()
+
+        with gzip.open(os.path.join(self.scratchDirectory, 'SampleLog.gz'), 'wb') as compressedFile:
+            compressedFile.writelines(self.lines)
+        compressedFile = bz2.BZ2File(os.path.join(self.scratchDirectory, 'SampleLog.bz2'), 'wb')
+        compressedFile.writelines(self.lines)
+        compressedFile.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.scratchDirectory)
+
+    def testReadCompressedLog(self):
+        """
+          Test that reading gzip and bzip2 compressed logs results in the lines of the uncompressed log
+        """
+
+        self.assertEqual(self.lines, list(LogReader.readLines(self.logPath)))
+        for extension in ['.gz', '.bz2']:
+            logPath = os.path.join(self.scratchDirectory, 'SampleLog' + extension)
+            self.assertTrue(LogReader.isCompressed(logPath))
+            self.assertEqual(self.lines, list(LogReader.readLines(logPath)))
+
+    def testReadXzLog(self):
+        """
+          Test that reading an xz compressed log results in the lines of the uncompressed log, if xz is installed
+        """
+
+        logPath = os.path.join(self.scratchDirectory, 'SampleLog.xz')
+        try:
+            with open(logPath, 'wb') as compressedFile:
+                subprocess.check_call(['xz', '-c', self.logPath], stdout=compressedFile)
+        except OSError:
+            return
+
+        self.assertEqual(self.lines, list(LogReader.readLines(logPath)))
+
+    def testParseCompressedLog(self):
+        """
+          Test that parsing a compressed log results in the expected log data
+        """
+
+        parsedLog = IntrepidRASParser.parse(os.path.join(self.scratchDirectory, 'SampleLog.gz'))
+        self.assertEqual(self.expectedParsedLog, parsedLog)
+
+    def testStopReading(self):
+        """
+          Test that a compressed log can be read partially, stopping the decompression thread
+        """
+
+        LogReader.BATCH_SIZE, batchSize = 1, LogReader.BATCH_SIZE
+        LogReader.BUFFER_SIZE, bufferSize = 1, LogReader.BUFFER_SIZE
+        try:
+            lines = LogReader.readLines(os.path.join(self.scratchDirectory, 'SampleLog.gz'))
+            self.assertEqual(self.lines[0], next(lines))
+            lines.close()
+        finally:
+            LogReader.BATCH_SIZE = batchSize
+            LogReader.BUFFER_SIZE = bufferSize
@@ -0,0 +1,121 @@
+from json import load
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser import ParsedLogCache, ParserUtil
+from src.parser.EventTable import EventTable
+from src.parser.intrepidRAS import IntrepidRASParser
+
+__author__ = 'Roman'
+
+class ParsedLogCacheTest(unittest.TestCase):
+    """
+      Unit tests for the ParsedLogCache module
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, copying the sample log to a scratch directory
+        """
+
+        self.projectRoot = os.environ['PROJECT_ROOT']
+        self.expectedParsedLog = load(open(self.projectRoot + '/test/parser/intrepid/json/ExpectedParsedLog.json'))
+
+        self.scratchDirectory = tempfile.mkdtemp()
+        self.cacheDirectory = os.path.join(self.scratchDirectory, 'cache')
+        self.logPath = os.path.join(self.scratchDirectory, 'SampleLog')
+        shutil.copy(self.projectRoot + '/test/parser/intrepid/log/SampleLog', self.logPath)
+
+        self.parseCount = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.scratchDirectory)
+
+    def countingParse(self, logFilePath):
+        """
+          Parses the log, counting the number of times the log was actually parsed
+        """
+
+        self.parseCount += 1
+        return IntrepidRASParser.iterParse(logFilePath)
+
+    def testCachedParse(self):
+        """
+          Test that the cached parse results in the same log data, loaded as memory-mapped columns
+        """
+
+        # Test
+        parsedLog = IntrepidRASParser.parse(self.logPath, cacheDirectory=self.cacheDirectory)
+        cachedLog = IntrepidRASParser.parse(self.logPath, cacheDirectory=self.cacheDirectory)
+
+        # Verify
+        self.assertTrue(isinstance(cachedLog, EventTable))
+        self.assertEqual(self.expectedParsedLog, list(parsedLog))
+        self.assertEqual(self.expectedParsedLog, list(cachedLog))
+        self.assertEqual('r', cachedLog.timestamps.mode)
+
+    def testLogParsedOnlyOnce(self):
+        """
+          Test that an unchanged log is only parsed the first time it is loaded
+        """
+
+        # Test
+        ParsedLogCache.load(self.logPath, 'spec', self.countingParse, self.cacheDirectory)
+        ParsedLogCache.load(self.logPath, 'spec', self.countingParse, self.cacheDirectory)
+
+        # Verify
+        self.assertEqual(1, self.parseCount)
+
+    def testCacheInvalidated(self):
+        """
+          Test that changing either the log file or the field specification invalidates the cache
+        """
+
+        # Setup
+        ParsedLogCache.load(self.logPath, 'spec', self.countingParse, self.cacheDirectory)
+
+        # Test
+        ParsedLogCache.load(self.logPath, 'otherSpec', self.countingParse, self.cacheDirectory)
+        with open(self.logPath, 'ab') as logFile:
+            logFile.write('\n')
+        ParsedLogCache.load(self.logPath, 'spec', self.countingParse, self.cacheDirectory)
+
+        # Verify
+        self.assertEqual(3, self.parseCount)
+
+    def testStaleEntriesPruned(self):
+        """
+          Test that the entries of an older state of the log file, and the least recently used entries beyond
+            MAX_ENTRIES, are removed
+        """
+
+        # Setup
+        ParsedLogCache.load(self.logPath, 'spec', self.countingParse, self.cacheDirectory)
+        with open(self.logPath, 'ab') as logFile:
+            logFile.write('\n')
+
+        # Test
+        ParsedLogCache.load(self.logPath, 'spec', self.countingParse, self.cacheDirectory)
+        entries = os.listdir(self.cacheDirectory)
+        for index in xrange(ParsedLogCache.MAX_ENTRIES + 1):
+            ParsedLogCache.load(self.logPath, 'spec %d' % index, self.countingParse, self.cacheDirectory)
+
+        # Verify
+        self.assertEqual(1, len(entries))
+        self.assertEqual(ParsedLogCache.MAX_ENTRIES, len(os.listdir(self.cacheDirectory)))
+        self.assertFalse(entries[0] in os.listdir(self.cacheDirectory))
+
+    def testUncacheablePredicate(self):
+        """
+          Test that predicates described by their memory address are rejected, and the others have a stable description
+        """
+
+        # Test
+        self.assertRaises(ValueError, IntrepidRASParser.parse, self.logPath, cacheDirectory=self.cacheDirectory,
+                          predicates={'SEVERITY': lambda severity: severity == 'INFO'})
+        spec = ParserUtil.predicateSpec({'SEVERITY': ParserUtil.AllOf(set(['INFO', 'WARN']), ParserUtil.TimeRange(1, 2))})
+
+        # Verify
+        self.assertEqual(repr([('SEVERITY', ('AllOf', [['INFO', 'WARN'], ParserUtil.TimeRange(1, 2)]))]), repr(spec))
+        self.assertRaises(ValueError, ParserUtil.predicateSpec, {'SEVERITY': ParserUtil.AllOf(len)})
@@ -1,7 +1,11 @@
 from json import load
 import os
+import pickle
+from types import GeneratorType
 import unittest
 from src.parser import ParserUtil, RegexParser
+from src.parser.LogRecord import LogRecord
+from src.parser.ParserError import ParserError
 
 __author__ = 'Roman'
 
@@ -43,6 +47,85 @@ class RegexParserTest(unittest.TestCase):
         self.assertEqual(expectedParsedLog, parsedLog)
         self.assertEqual(expectedSummarizedLog, summarizedLog)
 
+    def testParseWithPredicates(self):
+        """
+          Test that parsing the 'SampleLog' file with predicates only results in the entries passing them, without
+            reporting the rejected lines as skipped
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/regex/log/SampleLog'
+
+        # Test & verify
+        self.assertEqual(expectedParsedLog[1:], RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2,
+                                                                  predicates={'NAME': set(['Bobby', 'Alice'])}))
+        self.assertEqual(expectedParsedLog[:1], RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2,
+                                                                  predicates={'ID': lambda id: len(id) > 3}))
+        self.assertEqual([], RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2,
+                                               predicates={'NAME': ['Joey'], 'ID': ['567']}))
+        self.assertRaises(ParserError, RegexParser.parse, logPath, self.regexKeys, predicates={'SEVERITY': ['INFO']})
+
+    def testParseWithPredicateValues(self):
+        """
+          Test that values to keep given as a one-shot iterable or as values that are not strings are checked in the
+            same way as a set of strings
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/regex/log/SampleLog'
+
+        # Test & verify
+        names = (name for name in ['Bobby', 'Alice'])
+        self.assertEqual(expectedParsedLog[1:], RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2,
+                                                                  predicates={'NAME': names}))
+        self.assertEqual([], RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2, predicates={'ID': [567]}))
+        self.assertEqual([entry for entry in expectedParsedLog if entry['ID'] == '567'],
+                         RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2,
+                                           predicates={'ID': [567, '567'], 'NAME': [u'Bobby']}))
+
+    def testParseWithFields(self):
+        """
+          Test that parsing the 'SampleLog' file with a projection only keeps the given fields, including when a
+            predicate needs a field that is not kept
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/regex/log/SampleLog'
+
+        # Test & verify
+        self.assertEqual([{'NAME': entry['NAME']} for entry in expectedParsedLog],
+                         RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2, fields=['NAME']))
+        self.assertEqual([{'ID': '567', 'TELEPHONE': '(217)987-6543'}],
+                         RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2, fields=['ID', 'TELEPHONE'],
+                                           predicates={'NAME': ['Bobby']}))
+        self.assertRaises(ParserError, RegexParser.parse, logPath, self.regexKeys, fields=['SEVERITY'])
+
+    def testParseCompactRecords(self):
+        """
+          Test that parsing the 'SampleLog' file into compact records results in the expected log data, which can be
+            accessed as dictionaries and pickled for a parallel parse
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/regex/log/SampleLog'
+
+        # Test
+        parsedLog = RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2, compact=True)
+
+        # Verify
+        self.assertTrue(isinstance(parsedLog[0], LogRecord))
+        self.assertEqual(expectedParsedLog, parsedLog)
+        self.assertEqual(expectedParsedLog[0]['NAME'], parsedLog[0]['NAME'])
+        self.assertEqual(sorted(expectedParsedLog[0].keys()), sorted(parsedLog[0].keys()))
+        self.assertEqual(None, parsedLog[0].get('SEVERITY'))
+        self.assertEqual(expectedParsedLog, pickle.loads(pickle.dumps(parsedLog, pickle.HIGHEST_PROTOCOL)))
+        self.assertEqual([{'NAME': entry['NAME']} for entry in expectedParsedLog],
+                         RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2, fields=['NAME'], compact=True))
+
     def testParseInvalidLog(self):
         """
             Test that parsing a log file where the regex does not match returns an empty log
@@ -57,4 +140,39 @@ class RegexParserTest(unittest.TestCase):
 
         #Verify
         self.assertEqual([], parsedLog)
-        self.assertEqual({}, summarizedLog)
\ No newline at end of file
+        self.assertEqual({}, summarizedLog)
+
+    def testIterParseValidLog(self):
+        """
+          Test that lazily parsing the 'SampleLog' file yields the same log data, one entry at a time
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/regex/log/SampleLog'
+
+        # Test
+        parsedLog = RegexParser.iterParse(logPath, self.regexKeys, skipFirstLines=2)
+
+        # Verify
+        self.assertTrue(isinstance(parsedLog, GeneratorType))
+        self.assertEqual(expectedParsedLog[0], parsedLog.next())
+        self.assertEqual(expectedParsedLog[1:], list(parsedLog))
+
+    def testParallelParse(self):
+        """
+          Test that parsing log files with several processes results in the same log data, in the same order
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/regex/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/regex/log/SampleLog'
+        invalidLogPath = self.projectRoot + '/test/parser/regex/log/InvalidLog'
+
+        # Test
+        parsedLog = RegexParser.parse(logPath, self.regexKeys, skipFirstLines=2, processes=2)
+        parsedInvalidLog = RegexParser.parse(invalidLogPath, self.regexKeys, skipFirstLines=2, processes=2)
+
+        # Verify
+        self.assertEqual(expectedParsedLog, parsedLog)
+        self.assertEqual([], parsedInvalidLog)
\ No newline at end of file
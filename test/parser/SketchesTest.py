@@ -0,0 +1,84 @@
+import random
+import unittest
+from src.parser.Sketches import HyperLogLog, MinHash, SpaceSaving
+
+__author__ = 'Roman'
+
+class SketchesTest(unittest.TestCase):
+    """
+      Unit tests for the Sketches module
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, building a stream with a few heavy hitters among many rare values
+        """
+
+        randomGenerator = random.Random(0)
+        self.stream = ['heavy %d' % (index % 5) for index in xrange(5000)] + \
+                      ['rare %d' % randomGenerator.randint(0, 20000) for index in xrange(20000)]
+        randomGenerator.shuffle(self.stream)
+
+    def testHyperLogLog(self):
+        """
+          Test that the distinct count is within a few percent, for small and large counts, and after merging sketches
+        """
+
+        sketch = HyperLogLog(12)
+        for value in self.stream[:100]:
+            sketch.add(value)
+        self.assertAlmostEqual(len(set(self.stream[:100])), sketch.count(), delta=3)
+
+        firstHalf = HyperLogLog(12)
+        secondHalf = HyperLogLog(12)
+        for value in self.stream[:12500]:
+            firstHalf.add(value)
+        for value in self.stream[12500:]:
+            secondHalf.add(value)
+        firstHalf.merge(secondHalf)
+
+        distinct = len(set(self.stream))
+        self.assertAlmostEqual(distinct, firstHalf.count(), delta=distinct * 0.05)
+        self.assertRaises(ValueError, firstHalf.merge, HyperLogLog(10))
+
+    def testSpaceSaving(self):
+        """
+          Test that the heavy hitters are found, with counts overestimated by at most their error, and after merging
+            sketches
+        """
+
+        sketch = SpaceSaving(50)
+        firstHalf = SpaceSaving(50)
+        secondHalf = SpaceSaving(50)
+        for index, value in enumerate(self.stream):
+            sketch.add(value)
+            (firstHalf if index % 2 == 0 else secondHalf).add(value)
+        firstHalf.merge(secondHalf)
+
+        for summary in [sketch, firstHalf]:
+            top = summary.top(5)
+            self.assertEqual(['heavy %d' % index for index in xrange(5)], sorted(value for value, count, error in top))
+            for value, count, error in top:
+                self.assertTrue(count - error <= self.stream.count(value) <= count)
+
+    def testMinHash(self):
+        """
+          Test that signatures estimate the Jaccard similarity, and that only similar sets are likely to share a band
+        """
+
+        minHash = MinHash(256)
+        set1 = range(0, 100)
+        set2 = range(50, 150)
+        set3 = range(1000, 1100)
+        self.assertEqual(256, len(minHash.signature(set1)))
+        self.assertEqual(list(minHash.signature(set1)), list(MinHash(256).signature(list(reversed(set1)))))
+        self.assertAlmostEqual(1.0 / 3, MinHash.similarity(minHash.signature(set1), minHash.signature(set2)), delta=0.1)
+        self.assertEqual(0.0, MinHash.similarity(minHash.signature(set1), minHash.signature(set3)))
+        self.assertEqual(1.0, MinHash.similarity(minHash.signature([]), minHash.signature([])))
+
+        minHash = MinHash(64)
+        bands = minHash.bands(minHash.signature(set1), 16)
+        self.assertEqual(16, len(set(bands)))
+        self.assertTrue(set(bands) & set(minHash.bands(minHash.signature(range(0, 99)), 16)))
+        self.assertFalse(set(bands) & set(minHash.bands(minHash.signature(set3), 16)))
+
@@ -1,7 +1,9 @@
 from json import load
 import os
+from types import GeneratorType
 import unittest
 from src.parser import ParserUtil, TableParser
+from src.parser.LogRecord import LogRecord
 
 __author__ = 'Roman'
 
@@ -41,4 +43,58 @@ class TableParserTest(unittest.TestCase):
 
         # Verify
         self.assertEqual(expectedParsedLog, parsedLog)
-        self.assertEqual(expectedSummarizedLog, summarizedLog)
\ No newline at end of file
+        self.assertEqual(expectedSummarizedLog, summarizedLog)
+
+    def testParseWithFields(self):
+        """
+          Test that parsing the 'SampleLog' file with a projection only keeps the given fields
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/table/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/table/log/SampleLog'
+
+        # Test
+        parsedLog = TableParser.parse(logPath, self.tableKeys, skipFirstLines=2, fields=['ID', 'TELEPHONE'])
+
+        # Verify
+        self.assertEqual([{'ID': entry['ID'], 'TELEPHONE': entry['TELEPHONE']} for entry in expectedParsedLog],
+                         parsedLog)
+
+    def testParseCompactRecords(self):
+        """
+          Test that parsing the 'SampleLog' file into compact records results in the expected log data
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/table/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/table/log/SampleLog'
+
+        # Test
+        parsedLog = TableParser.parse(logPath, self.tableKeys, skipFirstLines=2, compact=True)
+        projectedLog = TableParser.parse(logPath, self.tableKeys, skipFirstLines=2, fields=['TELEPHONE'], compact=True)
+
+        # Verify
+        self.assertTrue(isinstance(parsedLog[0], LogRecord))
+        self.assertEqual(expectedParsedLog, parsedLog)
+        self.assertEqual([{'TELEPHONE': entry['TELEPHONE']} for entry in expectedParsedLog], projectedLog)
+
+        parsedLog[0][ParserUtil.TIMESTAMP_KEY] = 0
+        self.assertEqual(dict(expectedParsedLog[0], **{ParserUtil.TIMESTAMP_KEY: 0}), parsedLog[0])
+
+    def testIterParseValidLog(self):
+        """
+          Test that lazily parsing the 'SampleLog' file yields the same log data, one entry at a time
+        """
+
+        # Setup
+        expectedParsedLog = load(open(self.projectRoot + '/test/parser/table/json/ExpectedParsedLog.json'))
+        logPath = self.projectRoot + '/test/parser/table/log/SampleLog'
+
+        # Test
+        parsedLog = TableParser.iterParse(logPath, self.tableKeys, skipFirstLines=2)
+
+        # Verify
+        self.assertTrue(isinstance(parsedLog, GeneratorType))
+        self.assertEqual(expectedParsedLog[0], parsedLog.next())
+        self.assertEqual(expectedParsedLog[1:], list(parsedLog))
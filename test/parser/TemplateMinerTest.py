@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser.BlueGene import BlueGeneParser
+from src.parser.TemplateMiner import TemplateMiner
+
+__author__ = 'Roman'
+
+class TemplateMinerTest(unittest.TestCase):
+    """
+      Unit tests for the TemplateMiner class
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, creating a new miner
+        """
+
+        self.templateMiner = TemplateMiner()
+
+    def testMineTemplates(self):
+        """
+          Test that messages differing only in their variable parts share a template, with those parts as parameters
+        """
+
+        first = self.templateMiner.add('instruction cache parity error corrected')
+        second = self.templateMiner.add('generating core.2275')
+        third = self.templateMiner.add('generating core.862')
+        fourth = self.templateMiner.add('instruction cache parity error corrected')
+        fifth = self.templateMiner.add('data TLB error interrupt')
+
+        self.assertEqual((0, []), first)
+        self.assertEqual((1, []), second)
+        self.assertEqual((1, ['core.862']), third)
+        self.assertEqual((0, []), fourth)
+        self.assertEqual((2, []), fifth)
+        self.assertEqual('generating <*>', self.templateMiner.template(1))
+        self.assertEqual(3, len(self.templateMiner.templates))
+
+    def testMaxChildren(self):
+        """
+          Test that messages are routed to a wildcard node once a node has too many children
+        """
+
+        templateMiner = TemplateMiner(maxChildren=2)
+        for word in ['alpha', 'beta', 'gamma', 'delta']:
+            templateMiner.add(word + ' failed to start')
+        self.assertEqual(['<*>', 'alpha'], sorted(templateMiner.root[4]))
+        self.assertEqual(['alpha failed to start', '<*> failed to start'],
+                         [templateMiner.template(templateId) for templateId in xrange(len(templateMiner.templates))])
+
+    def testParseTemplateIds(self):
+        """
+          Test that the Blue Gene parser adds the template id of each message as an integer field
+        """
+
+        scratchDirectory = tempfile.mkdtemp()
+        try:
+            logPath = os.path.join(scratchDirectory, 'bg.log')
+            with open(logPath, 'w') as logFile:
+                for number in [1, 2, 3]:
+                    logFile.write('- 1117838570 2005.06.03 R02-M1-N0-C:J12-U11 2005-06-03-15.42.5%d.363779 '
+                                  'R02-M1-N0-C:J12-U11 RAS KERNEL INFO generating core.%d\n' % (number, number))
+
+            parsedLog = BlueGeneParser.parse(logPath, fields=['SEVERITY'], templateMiner=self.templateMiner)
+            self.assertEqual([0, 0, 0], [entry['TEMPLATE_ID'] for entry in parsedLog])
+            self.assertEqual('generating <*>', self.templateMiner.template(0))
+
+            # Cached logs are mined again by the given miner, which may already know other templates
+            cacheDirectory = os.path.join(scratchDirectory, 'cache')
+            for templateMiner in [TemplateMiner(), self.templateMiner]:
+                templateMiner.add('instruction cache parity error corrected')
+                for count in xrange(2):
+                    parsedLog = BlueGeneParser.parse(logPath, cacheDirectory=cacheDirectory, fields=['SEVERITY'],
+                                                     templateMiner=templateMiner)
+                    templateId = templateMiner.add('generating core.4')[0]
+                    self.assertEqual([templateId] * 3, [entry['TEMPLATE_ID'] for entry in parsedLog])
+            self.assertEqual(1, len(os.listdir(cacheDirectory)))
+        finally:
+            shutil.rmtree(scratchDirectory)
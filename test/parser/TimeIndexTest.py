@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser import TimeIndex, RegexParser, ParserUtil
+
+__author__ = 'Roman'
+
+# The layout of the synthetic log, copied here rather than imported from another test
+LOG_KEYS = [
+    ('ID', "\d+"),
+    ('EVENT_TIME', "\S+"),
+    ('MESSAGE', ".*")
+]
+
+class TimeIndexTest(unittest.TestCase):
+    """
+      Unit tests for the TimeIndex module
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, writing a log with one event per second into a scratch directory. The events of the
+            second half of the minute are written in reverse, so that the log is not entirely in time order.
+        """
+
+        self.scratchDirectory = tempfile.mkdtemp()
+        self.logPath = os.path.join(self.scratchDirectory, 'SampleLog')
+
+        seconds = range(30) + range(59, 29, -1)
+        self.lines = ['%d 2009-01-05-00.00.%02d.000000 event %d\n' % (number, second, number)
+                      for number, second in enumerate(seconds)]
+        with open(self.logPath, 'wb') as logFile:
+            logFile.write('HEADER\n')
+            logFile.writelines(self.lines)
+
+        TimeIndex.INDEX_INTERVAL, self.interval = 4, TimeIndex.INDEX_INTERVAL
+
+    def tearDown(self):
+        TimeIndex.INDEX_INTERVAL = self.interval
+        shutil.rmtree(self.scratchDirectory)
+
+    def expectedLog(self, start, end):
+        """
+          Parses the whole log and keeps the events within [start, end)
+        """
+
+        timeRange = ParserUtil.TimeRange(start, end)
+        return [entry for entry in RegexParser.parse(self.logPath, LOG_KEYS, skipFirstLines=1)
+                if timeRange(entry['EVENT_TIME'])]
+
+    def testByteRange(self):
+        """
+          Test that the part of the log found for a time range begins and ends on block boundaries around the range
+        """
+
+        index = TimeIndex.build(self.logPath, 4)
+        self.assertEqual(range(0, 61, 4), index['lineNumbers'])
+
+        start = ParserUtil.eventTimestamp('2009-01-05-00.00.10.000000')
+        end = ParserUtil.eventTimestamp('2009-01-05-00.00.20.000000')
+        startOffset, lineNumber, endOffset = TimeIndex.byteRange(index, start, end)
+        self.assertEqual(8, lineNumber)
+        self.assertEqual(index['offsets'][2], startOffset)
+        self.assertEqual(index['offsets'][6], endOffset)
+
+        self.assertEqual((0, 0, None), TimeIndex.byteRange(index))
+
+    def testParseTimeRange(self):
+        """
+          Test that parsing a time range, in and out of time order, results in the same events as filtering the log
+        """
+
+        for start, end in [('2009-01-05-00.00.10.000000', '2009-01-05-00.00.20.000000'),
+                           ('2009-01-05-00.00.40.000000', '2009-01-05-00.00.45.000000'),
+                           ('2009-01-05-00.00.00.000000', None),
+                           (None, '2009-01-05-00.00.03.000000')]:
+            expectedLog = self.expectedLog(start, end)
+            self.assertTrue(len(expectedLog) > 0)
+            self.assertEqual(expectedLog, RegexParser.parse(self.logPath, LOG_KEYS, skipFirstLines=1, start=start,
+                                                            end=end))
+            self.assertEqual(expectedLog, RegexParser.parse(self.logPath, LOG_KEYS, skipFirstLines=1, start=start,
+                                                            end=end, processes=2))
+
+    def testStaleIndex(self):
+        """
+          Test that the index is saved next to the log, and built again once the log changes
+        """
+
+        start = '2009-01-05-00.01.00.000000'
+        self.assertEqual([], RegexParser.parse(self.logPath, LOG_KEYS, skipFirstLines=1, start=start))
+        self.assertTrue(os.path.exists(TimeIndex.indexPath(self.logPath)))
+
+        with open(self.logPath, 'ab') as logFile:
+            logFile.write('60 2009-01-05-00.01.00.000000 event 60\n')
+        os.utime(self.logPath, (0, 0))
+
+        parsedLog = RegexParser.parse(self.logPath, LOG_KEYS, skipFirstLines=1, start=start)
+        self.assertEqual(['60'], [entry['ID'] for entry in parsedLog])
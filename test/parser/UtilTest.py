@@ -1,5 +1,6 @@
 import unittest
 import os
+from datetime import datetime
 from src.parser import ParserUtil
 
 __author__ = 'Roman'
@@ -35,4 +36,51 @@ class UtilTest(unittest.TestCase):
         self.assertTrue(ParserUtil.isNumber('1.0'))
         self.assertTrue(ParserUtil.isNumber('-1.0'))
         self.assertTrue(ParserUtil.isNumber('+2.0'))
-        self.assertTrue(ParserUtil.isNumber('-6.0'))
\ No newline at end of file
+        self.assertTrue(ParserUtil.isNumber('-6.0'))
+
+    def testEventTimestamp(self):
+        """
+          Test that 'eventTimestamp' agrees with strptime, and that 'eventTime' converts its result back
+        """
+
+        for eventTime in ['2005-06-03-15.42.50.363779', '2008-01-01-00.00.00.000000', '1999-12-31-23.59.59.999999']:
+            expected = ParserUtil.microseconds(datetime.strptime(eventTime, ParserUtil.TIMESTAMP_FORMAT)
+                                               - ParserUtil.EPOCH)
+            self.assertEqual(expected, ParserUtil.eventTimestamp(eventTime))
+            self.assertEqual(eventTime, ParserUtil.eventTime(ParserUtil.eventTimestamp(eventTime)))
+
+
+    def testEventTimestampFallback(self):
+        """
+          Test that timestamps without the fixed layout are decoded with strptime, and invalid ones are rejected
+        """
+
+        self.assertEqual(ParserUtil.eventTimestamp('2005-06-03-15.42.50.363779'),
+                         ParserUtil.eventTimestamp('2005-06-03-15.42.50.363779'[:-3]) + 779)
+        self.assertRaises(ValueError, ParserUtil.eventTimestamp, '2005-06-03-25.42.50.363779')
+        self.assertRaises(ValueError, ParserUtil.eventTimestamp, 'not a timestamp')
+
+
+    def testStreamingSummary(self):
+        """
+          Test that a streaming summary counts low-cardinality fields exactly and sketches high-cardinality fields, and
+            that merging the summaries of two halves of a log summarizes the whole log
+        """
+
+        log = [{'RECID': str(index), 'SEVERITY': ['INFO', 'WARN', 'FATAL'][index % 3]} for index in xrange(3000)]
+        summary = ParserUtil.streamingSummary(log, exactLimit=100)
+
+        self.assertTrue(summary.isExact('SEVERITY'))
+        self.assertEqual(3, summary.distinctCount('SEVERITY'))
+        self.assertEqual(sorted(ParserUtil.summary(log)['SEVERITY']), sorted(summary.values('SEVERITY')))
+        self.assertEqual([('INFO', 1000, 0)], summary.topValues('SEVERITY', 1))
+
+        self.assertFalse(summary.isExact('RECID'))
+        self.assertAlmostEqual(3000, summary.distinctCount('RECID'), delta=100)
+
+        merged = ParserUtil.streamingSummary(log[:50], exactLimit=100)
+        merged.merge(ParserUtil.streamingSummary(log[50:], exactLimit=100))
+        self.assertEqual(3000, merged.size)
+        self.assertEqual(summary.topValues('SEVERITY'), merged.topValues('SEVERITY'))
+        self.assertFalse(merged.isExact('RECID'))
+        self.assertAlmostEqual(3000, merged.distinctCount('RECID'), delta=100)
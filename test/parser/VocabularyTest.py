@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser.Vocabulary import Vocabulary
+
+__author__ = 'Roman'
+
+class VocabularyTest(unittest.TestCase):
+    """
+      Unit tests for the Vocabulary class
+    """
+
+    def setUp(self):
+        """
+          Setup before each test, building the vocabulary of a small log
+        """
+
+        self.log = [
+            {'MESSAGE': 'instruction cache parity error corrected'},
+            {'MESSAGE': 'data cache parity error'},
+            {'MESSAGE': 'instruction cache parity error corrected'}
+        ]
+        self.vocabulary = Vocabulary.fromLog(self.log)
+
+    def testTokenize(self):
+        """
+          Test that messages are converted to the sorted ids of their distinct words, dropping unknown words
+        """
+
+        self.assertEqual(6, len(self.vocabulary))
+        self.assertEqual([0, 1, 2, 3, 4], list(self.vocabulary.tokenize('instruction cache parity error corrected')))
+        self.assertEqual([1, 3, 5], list(self.vocabulary.tokenize('error error data cache unknown')))
+        self.assertFalse('unknown' in self.vocabulary)
+
+        self.assertEqual([1, 6], list(self.vocabulary.tokenize('unknown cache', grow=True)))
+        self.assertTrue('unknown' in self.vocabulary)
+
+    def testTokenizeLog(self):
+        """
+          Test that the events of a log with the same message share the same tokens, and that events that already have
+            tokens keep them
+        """
+
+        tokens = self.vocabulary.tokenizeLog(self.log + [{'MESSAGE': 'data', 'TOKENS': [1]}])
+        self.assertEqual([[0, 1, 2, 3, 4], [1, 2, 3, 5], [0, 1, 2, 3, 4], [1]], [list(entry) for entry in tokens])
+        self.assertTrue(tokens[0] is tokens[2])
+
+    def testSaveAndLoad(self):
+        """
+          Test that a saved vocabulary is loaded with the same ids
+        """
+
+        scratchDirectory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(scratchDirectory, 'vocabulary.json')
+            self.vocabulary.add('\xff\xfe')
+            self.vocabulary.add('\xff\xfd')
+            self.vocabulary.add('caf\xc3\xa9')
+            self.vocabulary.save(path)
+            loaded = Vocabulary.load(path)
+            self.assertEqual(self.vocabulary.words, loaded.words)
+            self.assertTrue(isinstance(loaded.words[0], str))
+            self.assertEqual(list(self.vocabulary.tokenize('data cache')), list(loaded.tokenize('data cache')))
+        finally:
+            shutil.rmtree(scratchDirectory)
@@ -2,6 +2,7 @@ from datetime import timedelta
 from json import load
 import os
 import unittest
+from src.parser.EventTable import EventTable
 from src.strategy.SlidingWindowStrategy import SlidingWindowStrategy
 
 __author__ = 'jon'
@@ -41,6 +42,22 @@ class SlidingWindowTest(unittest.TestCase):
             self.assertEqual('Training data for SlidingWindow must be non-empty!', error.message)
 
 
+    def testSortData(self):
+        """
+          Tests that out-of-order log data is sorted by time before being split into windows, if asked to
+        """
+
+        shuffledLogData = self.mockLogData[1::2] + self.mockLogData[::2]
+        self.assertNotEqual(self.mockLogData, shuffledLogData)
+
+        sortingStrategy = SlidingWindowStrategy(sortData=True)
+        self.assertEqual(self.mockLogData, sortingStrategy.sortedData(shuffledLogData))
+        self.assertEqual(self.mockLogData, list(sortingStrategy.sortedData(EventTable.fromRecords(shuffledLogData))))
+        self.assertEqual(self.slidingWindowStrategy.splitDataToIntervals(self.mockLogData, timedelta(hours=1), 5),
+                         sortingStrategy.splitDataToIntervals(sortingStrategy.sortedData(shuffledLogData),
+                                                              timedelta(hours=1), 5))
+
+
     def testParseLogWindows(self):
         """
           Tests that SlidingWindow correctly categorizes 5 adjacent sub-windows
@@ -148,3 +165,23 @@ class SlidingWindowTest(unittest.TestCase):
 
         # Verify
         self.assertEqual(expectedWindowedData, actualWindowedData)
+
+
+    def testParseTableLogWindows(self):
+        """
+          Tests that SlidingWindow splits columnar log data into the same windows as the equivalent list of log entries
+        """
+
+        # Setup
+        self.slidingWindowStrategy.windowDelta = timedelta(hours=4)
+        table = EventTable.fromRecords(self.mockLogData)
+        expectedWindowedData = load(open(self.projectRoot + '/test/strategy/slidingWindow/json/ExpectedExtendedModifiedIntervalLogWindows.json'))
+
+        # Test
+        interval = self.slidingWindowStrategy.windowDelta
+        numberOfIntervals = self.slidingWindowStrategy.numberOfSubWindows
+        actualWindowedData = self.slidingWindowStrategy.splitDataToIntervals(table, interval, numberOfIntervals)
+
+        # Verify
+        actualWindowedData = [[list(subWindow) for subWindow in window] for window in actualWindowedData]
+        self.assertEqual(expectedWindowedData, actualWindowedData)